@@ -0,0 +1,72 @@
+"""
+Atomic file replacement for BiblioGenius curated list tooling.
+
+Every script that rewrites a list, manifest, sidecar or bundle writes the
+new content to a uniquely named temp file next to the target (mkstemp, so
+concurrent writers never share one) and renames it over the target. An
+interrupted write leaves the old file in place, and the new file keeps the
+permissions of the one it replaces rather than mkstemp's 0600.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+# Read once at import: os.umask() can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _target_mode(path: Path) -> int:
+    """Permissions of the file being replaced, or the umask default for a new one."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+class AtomicFile:
+    """A temp file that replaces `path` on commit().
+
+    Use it as a context manager; leaving the block without commit(), or on
+    an exception, removes the temp file and leaves `path` as it was. File
+    methods (write, seek, ...) are those of the temp file.
+    """
+
+    def __init__(self, path: Path, binary: bool = False):
+        self.path = Path(path)
+        fd, self.tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        self.file = os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def __enter__(self) -> "AtomicFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+        if self.tmp:
+            os.unlink(self.tmp)
+            self.tmp = None
+
+    def commit(self):
+        """Close the temp file and rename it over the target."""
+        self.file.close()
+        os.chmod(self.tmp, _target_mode(self.path))
+        os.replace(self.tmp, self.path)
+        self.tmp = None
+
+
+def atomic_write_text(path: Path, text: str):
+    """Replace a file's content with `text` (UTF-8) without ever truncating it."""
+    with AtomicFile(path) as f:
+        f.write(text)
+        f.commit()
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Replace a file's content with `data` without ever truncating it."""
+    with AtomicFile(path, binary=True) as f:
+        f.write(data)
+        f.commit()
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the BiblioGenius curated list tooling.
+
+Measures ISBN checksum throughput (after checking that the batched path
+agrees with the scalar one), YAML parse time over the curated lists,
+end-to-end process_yaml_file --fix runs and Wikidata prize fetches against a
+local stand-in server (with simulated latency and 429s), and generate_yaml on
+large synthetic result sets. Results are written as JSON and can be compared
+against a stored baseline; the run fails when a benchmark gets slower than
+the baseline by more than --tolerance.
+
+Usage:
+    python benchmark.py --output benchmark-results.json
+    python benchmark.py --baseline benchmark-baseline.json --tolerance 0.25
+    python benchmark.py --only isbn,yaml --repeat 5
+"""
+
+import argparse
+import io
+import json
+import platform
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import yaml
+
+import generate_from_wikidata
+import validate_isbns
+from curated_bundle import find_list_files, load_yaml
+from http_client import HTTPClient
+from isbn_utils import isbn13_check_digit, normalize_isbn, validate_batch, validate_isbn
+from list_merge import entry_isbn
+from lookup_cache import LookupCache
+from rate_limit import TokenBucket
+
+RESULTS_VERSION = 1
+
+
+class StandInServer:
+    """Local HTTP server imitating Open Library and the Wikidata SPARQL endpoint.
+
+    Every response is delayed by `latency` seconds and every `throttle_every`-th
+    request is answered with 429 and a Retry-After of `retry_after` seconds.
+    """
+
+    def __init__(self, latency: float = 0.05, throttle_every: int = 10, retry_after: float = 0.05, rows_per_prize: int = 1000):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.rows_per_prize = rows_per_prize
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "StandInServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _throttle(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            throttle = self.throttle_every > 0 and self.requests % self.throttle_every == 0
+            self.throttled += throttle
+        return throttle
+
+    def search_docs(self, query: str) -> list:
+        """Open Library search docs: the queried book plus a few distractors."""
+        rng = random.Random(query)
+        docs = []
+        for i in range(5):
+            title = query if i == 0 else f"{query.split()[0]} volume {i}"
+            docs.append({
+                "title": title,
+                "author_name": [f"Author {rng.randrange(1000)}"],
+                "isbn": [synthetic_isbn(rng) for _ in range(3)],
+                "language": ["fre" if i % 2 else "eng"],
+            })
+        return docs
+
+    def prize_bindings(self, sparql: str) -> list:
+        """SPARQL bindings for the prizes in a VALUES clause, honouring LIMIT/OFFSET."""
+        values = re.search(r"VALUES \?prize \{([^}]*)\}", sparql)
+        bindings = []
+        for prize in re.findall(r"wd:(Q\d+)", values.group(1) if values else ""):
+            rng = random.Random(prize)
+            for i in range(self.rows_per_prize):
+                binding = {
+                    "prize": {"value": f"http://www.wikidata.org/entity/{prize}"},
+                    "work": {"value": f"http://www.wikidata.org/entity/Q{prize[1:]}{i:05d}"},
+                    "workLabel": {"value": f"Work {i} of {prize}"},
+                    "authorLabel": {"value": f"Author {rng.randrange(1000)}"},
+                    "year": {"value": str(2025 - i % 100)},
+                }
+                if i % 3:
+                    binding["isbn13"] = {"value": synthetic_isbn(rng)}
+                bindings.append(binding)
+        page = re.search(r"LIMIT (\d+) OFFSET (\d+)", sparql)
+        if page:
+            limit, offset = int(page.group(1)), int(page.group(2))
+            bindings = bindings[offset:offset + limit]
+        return bindings
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: dict = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _respond(self):
+                time.sleep(server.latency)
+                if server._throttle():
+                    self._send(429, headers={"Retry-After": str(server.retry_after)})
+                    return
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                if parts.path == "/search.json":
+                    body = {"docs": server.search_docs(query.get("q", [""])[0])}
+                elif parts.path == "/sparql":
+                    body = {"results": {"bindings": server.prize_bindings(query.get("query", [""])[0])}}
+                elif parts.path.startswith("/isbn/"):
+                    body = {}
+                else:
+                    self._send(404)
+                    return
+                self._send(200, json.dumps(body).encode(), {"Content-Type": "application/json"})
+
+            do_GET = _respond
+            do_HEAD = _respond
+
+        return Handler
+
+
+def synthetic_isbn(rng: random.Random) -> str:
+    """A random ISBN-13 with a correct check digit."""
+    stem = "978" + "".join(str(rng.randrange(10)) for _ in range(9))
+    return stem + isbn13_check_digit(stem)
+
+
+def synthetic_isbn_inputs(count: int, seed: int = 42) -> list:
+    """A mix of valid ISBN-13s, hyphenated ISBN-10s and corrupted values."""
+    rng = random.Random(seed)
+    values = []
+    for i in range(count):
+        isbn = synthetic_isbn(rng)
+        if i % 4 == 1:
+            isbn = f"{isbn[3]}-{isbn[4:7]}-{isbn[7:12]}-X"
+        elif i % 4 == 2:
+            isbn = isbn[:-1] + str((int(isbn[-1]) + 1) % 10)
+        values.append(isbn)
+    return values
+
+
+# Inputs the batched path handles separately: separators, X check digits,
+# bad lengths and characters, non-ASCII digits (scalar fallback)
+ISBN_EDGE_CASES = [
+    "", " ", "-", "123", "030640615", "03064061522", "978030640615", "97803064061577",
+    "0-306-40615-2", "0 306 40615 2", "978-0-306-40615-7", "978 0 306 40615 7", "--9780306406157--",
+    "080442957X", "080442957x", "0-8044-2957-X", "X80442957X", "08044X9575", "0804429571",
+    "97803064061X7", "978030640615X", "9780306406158", "ABCDEFGHIJ", "ISBN9780306406157",
+    "٩٧٨٠٣٠٦٤٠٦١٥٧", "٠٣٠٦٤٠٦١٥٢", "²⁰⁷⁰³⁶⁰⁰²⁴", "９７８０３０６４０６１５７", "97803064０6157",
+]
+
+
+def scalar_isbn(value: str) -> tuple:
+    """(valid, ISBN-13) from the scalar functions validate_batch must agree with."""
+    try:
+        valid = validate_isbn(value)
+    except ValueError:
+        # Digits int() can't read (superscripts) are invalid for normalize_isbn too
+        valid = False
+    return valid, normalize_isbn(value)
+
+
+def check_isbn_batch(curated_path: Path, count: int = 20_000) -> int:
+    """Check validate_batch against the scalar path; returns how many inputs were compared.
+
+    Covers every ISBN in the curated lists, synthetic inputs and
+    ISBN_EDGE_CASES, in one batch so the scalar fallback rows are mixed in.
+    Raises AssertionError listing the inputs where the results differ.
+    """
+    values = list(ISBN_EDGE_CASES)
+    for filepath in parsable_lists(curated_path):
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = load_yaml(f) or {}
+        values += [entry_isbn(entry) for entry in data.get("books") or []]
+    values += synthetic_isbn_inputs(count, seed=5)
+
+    mask, normalized = validate_batch(values)
+    mismatches = []
+    for value, ok, isbn13 in zip(values, mask, normalized):
+        if isinstance(isbn13, bytes):
+            isbn13 = isbn13.decode("ascii")
+        if (bool(ok), isbn13) != scalar_isbn(value):
+            mismatches.append(value)
+    if mismatches:
+        raise AssertionError(f"validate_batch disagrees with validate_isbn on {len(mismatches)} inputs: {mismatches[:10]!r}")
+    return len(values)
+
+
+def timed(func, repeat: int = 1) -> float:
+    """Best wall-clock time of `repeat` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_isbn(repeat: int, curated_path: Path, count: int = 200_000) -> dict:
+    """Scalar and batched checksum validation throughput, once both agree."""
+    checked = check_isbn_batch(curated_path)
+    values = synthetic_isbn_inputs(count)
+    scalar = timed(lambda: [validate_isbn(v) for v in values], repeat)
+    batch = timed(lambda: validate_batch(values), repeat)
+    return {
+        "seconds": scalar,
+        "isbns": count,
+        "scalar_per_sec": round(count / scalar),
+        "batch_seconds": batch,
+        "batch_per_sec": round(count / batch),
+        "batch_checked": checked,
+    }
+
+
+def parsable_lists(curated_path: Path) -> list:
+    """List files that parse, so one broken list doesn't stop a benchmark."""
+    files = []
+    for filepath in find_list_files(curated_path):
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                load_yaml(f)
+        except yaml.YAMLError:
+            continue
+        files.append(filepath)
+    return files
+
+
+def bench_yaml(repeat: int, curated_path: Path) -> dict:
+    """Parse time of every curated list, with the fast and the pure-Python loader."""
+    files = parsable_lists(curated_path)
+    texts = [f.read_text(encoding="utf-8") for f in files]
+    fast = timed(lambda: [load_yaml(text) for text in texts], repeat)
+    pure = timed(lambda: [yaml.load(text, Loader=yaml.SafeLoader) for text in texts], repeat)
+    return {"seconds": fast, "files": len(files), "pure_python_seconds": pure}
+
+
+def synthetic_list(path: Path, entries: int, seed: int = 7):
+    """Write a list whose entries all need an ISBN search."""
+    rng = random.Random(seed)
+    lines = ["# Synthetic benchmark list", "id: benchmark", "version: 1", "", "books:"]
+    for i in range(entries):
+        lines.append(f'  - isbn: "{rng.randrange(10 ** 9)}"')
+        lines.append(f'    note: "Livre {i} {rng.randrange(10 ** 6)} - Auteur {i % 97}"')
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def bench_validate(server: StandInServer, curated_path: Path, entries: int, concurrency: int) -> dict:
+    """End-to-end process_yaml_file --fix over the corpus plus a synthetic list."""
+    v = validate_isbns
+    v.OPEN_LIBRARY_SEARCH = f"{server.url}/search.json"
+    v.OPEN_LIBRARY_ISBN = f"{server.url}/isbn/{{}}.json"
+    v.lookup_cache = LookupCache(directory=None)
+    v.rate_limiter = TokenBucket(rate=1000.0, burst=concurrency)
+    v.session = HTTPClient(rate_limiter=v.rate_limiter, pool_size=concurrency, backoff_base=0.01)
+    v.min_confidence = 0.0
+    v._search_memo.clear()
+    v._scheduled.clear()
+    requests_before, throttled_before = server.requests, server.throttled
+
+    with tempfile.TemporaryDirectory() as workdir:
+        files = []
+        for filepath in parsable_lists(curated_path):
+            target = Path(workdir) / filepath.relative_to(curated_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(filepath, target)
+            files.append(target)
+        files.append(Path(workdir) / "benchmark.yml")
+        synthetic_list(files[-1], entries)
+
+        totals = {"books": 0, "fixed": 0}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, redirect_stdout(io.StringIO()):
+            v.schedule_lookups([(filepath, None) for filepath in files], executor)
+            for filepath in files:
+                stats = v.process_yaml_file(filepath, fix=True, executor=executor)
+                for key in totals:
+                    totals[key] += stats.get(key, 0)
+        seconds = time.perf_counter() - started
+
+    v.session.close()
+    v.lookup_cache.close()
+    return {
+        "seconds": seconds,
+        "files": len(files),
+        **totals,
+        "requests": server.requests - requests_before,
+        "throttled": server.throttled - throttled_before,
+    }
+
+
+def bench_wikidata(server: StandInServer, prizes: int) -> dict:
+    """Paginated prize winner fetch for a batch of prizes."""
+    g = generate_from_wikidata
+    g.WIKIDATA_ENDPOINT = f"{server.url}/sparql"
+    g.lookup_cache = LookupCache(directory=None)
+    g.rate_limiter = TokenBucket(rate=1000.0)
+    g.session = HTTPClient(rate_limiter=g.rate_limiter, backoff_base=0.01)
+    prize_ids = [f"Q{900000 + i}" for i in range(prizes)]
+    requests_before = server.requests
+
+    started = time.perf_counter()
+    books = g.get_prize_winners_batch(prize_ids)
+    seconds = time.perf_counter() - started
+
+    g.session.close()
+    g.lookup_cache.close()
+    return {
+        "seconds": seconds,
+        "books": sum(len(b) for b in books.values()),
+        "requests": server.requests - requests_before,
+    }
+
+
+def bench_generate(repeat: int, count: int = 100_000) -> dict:
+    """generate_yaml, the streaming writer and merging into an existing list on a large synthetic result set."""
+    rng = random.Random(3)
+    books = [
+        {
+            "title": f'Work "{i}" of the series',
+            "author": f"Author {rng.randrange(5000)}",
+            "year": str(1900 + i % 125),
+            "isbn": synthetic_isbn(rng) if i % 3 else "",
+            "wikidata_id": f"Q{i}",
+        }
+        for i in range(count)
+    ]
+    fields = {
+        "list_id": "benchmark",
+        "title": {"en": "Benchmark"},
+        "description": {"en": "Synthetic list"},
+        "tags": ["benchmark"],
+    }
+    generate = timed(lambda: generate_from_wikidata.generate_yaml(books=books, **fields), repeat)
+    with tempfile.TemporaryDirectory() as workdir:
+        output = Path(workdir) / "benchmark.yml"
+        write = timed(lambda: generate_from_wikidata.write_yaml_list(output, iter(books), merge=False, **fields), repeat)
+        # Regenerating over the written list: parse, merge, and skip the unchanged write
+        merge = timed(lambda: generate_from_wikidata.write_yaml_list(output, iter(books), **fields), repeat)
+    return {"seconds": generate, "books": count, "write_seconds": write, "merge_seconds": merge}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Names of benchmarks slower than the baseline by more than `tolerance`."""
+    regressions = []
+    print(f"\n{'benchmark':<12} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            print(f"{name:<12} {'-':>10} {result['seconds']:>9.3f}s {'new':>8}")
+            continue
+        change = result["seconds"] / base["seconds"] - 1 if base["seconds"] else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  ✗"
+        print(f"{name:<12} {base['seconds']:>9.3f}s {result['seconds']:>9.3f}s {change:>+7.0%}{flag}")
+    return regressions
+
+
+BENCHMARKS = ("isbn", "yaml", "validate", "wikidata", "generate")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the curated list tooling")
+    parser.add_argument("--path", type=Path, default=Path("../assets/curated_lists"), help="Path to curated lists directory")
+    parser.add_argument("--output", type=Path, default=None, help="Write results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against results from a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"Comma-separated benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per CPU-bound benchmark; the best time is kept")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency in seconds")
+    parser.add_argument("--throttle-every", type=int, default=10, help="Answer every Nth request with 429 (0 = never)")
+    parser.add_argument("--entries", type=int, default=200, help="Entries in the synthetic list needing a search")
+    parser.add_argument("--concurrency", type=int, default=8, help="Lookup threads for the end-to-end benchmark")
+    parser.add_argument("--prizes", type=int, default=4, help="Prizes in the Wikidata fetch benchmark")
+    args = parser.parse_args()
+
+    curated_path = args.path
+    if not curated_path.exists():
+        # Try relative to script location
+        curated_path = Path(__file__).parent.parent / "assets" / "curated_lists"
+
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    server = None
+    if {"validate", "wikidata"} & set(selected):
+        server = StandInServer(latency=args.latency, throttle_every=args.throttle_every).start()
+
+    runners = {
+        "isbn": lambda: bench_isbn(args.repeat, curated_path),
+        "yaml": lambda: bench_yaml(args.repeat, curated_path),
+        "validate": lambda: bench_validate(server, curated_path, args.entries, args.concurrency),
+        "wikidata": lambda: bench_wikidata(server, args.prizes),
+        "generate": lambda: bench_generate(args.repeat),
+    }
+
+    results = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": {},
+    }
+    try:
+        for name in selected:
+            print(f"⏱ {name}...", flush=True)
+            result = runners[name]()
+            results["benchmarks"][name] = result
+            details = ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items())
+            print(f"  {details}")
+    finally:
+        if server:
+            server.stop()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"\n📊 Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Slower than baseline: {', '.join(regressions)}")
+            exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Checkpoint journal for resumable validate_isbns.py --fix runs.
+
+An append-only JSON-lines file recording completed lookups, fixes found but
+not yet written, and files whose fixes are on disk. Records are buffered and
+flushed (with fsync) every few records or seconds and whenever a file
+finishes, so an interrupted run loses at most its last few lookups. Several
+worker processes may append to one journal: each flush is a single
+O_APPEND write of whole lines.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class FixJournal:
+    """Buffered writer for the checkpoint journal."""
+
+    def __init__(self, path: Path, flush_every: int = 20, flush_interval: float = 5.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _append(self, record: dict, flush: bool = False):
+        with self._lock:
+            self._buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+            due = len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval
+            if flush or due:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            os.write(self._fd, "".join(self._buffer).encode("utf-8"))
+            os.fsync(self._fd)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def lookup(self, key: tuple, isbn: str, confidence: float):
+        """A search that got a definitive answer (including "nothing found")."""
+        self._append({"type": "lookup", "key": list(key), "isbn": isbn, "confidence": confidence})
+
+    def fix(self, file: str, index: int, old: str, new: str):
+        """A fix decided for a file but not yet written to it."""
+        self._append({"type": "fix", "file": file, "index": index, "old": old, "isbn": new})
+
+    def file_done(self, file: str, sha256: str, stats: dict):
+        """A file fully processed, with every fix written; flushed immediately."""
+        self._append({"type": "done", "file": file, "sha256": sha256, "stats": stats}, flush=True)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            os.close(self._fd)
+
+
+def load_journal(path: Path) -> dict:
+    """Replay a journal into completed lookups, pending fixes and finished files.
+
+    Returns {"lookups": {key: (isbn, confidence)}, "pending": {file: {index:
+    (old, new)}}, "done": {file: {"sha256", "stats"}}}. A torn last line from
+    an interrupted flush is ignored.
+    """
+    state = {"lookups": {}, "pending": {}, "done": {}}
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return state
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            kind = record.get("type")
+            if kind == "lookup":
+                state["lookups"][tuple(record["key"])] = (record["isbn"], record["confidence"])
+            elif kind == "fix":
+                state["pending"].setdefault(record["file"], {})[record["index"]] = (record["old"], record["isbn"])
+                state["done"].pop(record["file"], None)
+            elif kind == "done":
+                state["pending"].pop(record["file"], None)
+                state["done"][record["file"]] = {"sha256": record["sha256"], "stats": record["stats"]}
+    return state
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Fast YAML I/O and precompiled bundle for BiblioGenius curated lists.
+
+load_yaml/dump_yaml use libyaml (CSafeLoader/CSafeDumper) when PyYAML was
+built with it and fall back to the pure-Python classes otherwise.
+
+The bundle step compiles index.yml and every list under
+assets/curated_lists into one compact file (JSON, or msgpack when the
+output ends in .msgpack and msgpack is installed), together with an
+ISBN -> list ids inverted index, so consumers load everything in one read.
+
+Usage:
+    python curated_bundle.py --output curated_lists.json
+    python curated_bundle.py --path ../assets/curated_lists --output curated_lists.msgpack
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:
+    print("Please install dependencies: pip install pyyaml")
+    exit(1)
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from atomic_file import AtomicFile, atomic_write_bytes
+from isbn_utils import normalize_isbn
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+BUNDLE_VERSION = 1
+
+
+def load_yaml(stream):
+    """Parse YAML from a string or file with the fastest available safe loader."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def compose_yaml(stream):
+    """Parse YAML into a node tree whose marks give each value's source offsets."""
+    return yaml.compose(stream, Loader=SafeLoader)
+
+
+def dump_yaml(data) -> str:
+    """Serialize data as block-style YAML, keeping key order and Unicode."""
+    return yaml.dump(data, Dumper=SafeDumper, allow_unicode=True, default_flow_style=False, sort_keys=False)
+
+
+def find_list_files(curated_path: Path) -> list:
+    """All list files under the curated lists directory, excluding index.yml."""
+    return sorted(f for f in curated_path.rglob("*.yml") if f.name != "index.yml")
+
+
+def build_bundle(curated_path: Path, errors: list = None) -> dict:
+    """Load index.yml and every list into one dict with an ISBN inverted index.
+
+    Lists that fail to parse are skipped and reported in `errors` as
+    (path, message) pairs.
+    """
+    with open(curated_path / "index.yml", "r", encoding="utf-8") as f:
+        index = load_yaml(f)
+
+    lists = {}
+    isbn_index = {}
+    for filepath in find_list_files(curated_path):
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = load_yaml(f)
+        except yaml.YAMLError as e:
+            if errors is not None:
+                errors.append((filepath, str(e).splitlines()[0]))
+            continue
+        if not data:
+            continue
+        list_id = data.get("id") or filepath.stem
+        data["path"] = filepath.relative_to(curated_path).as_posix()
+        lists[list_id] = data
+
+        for book in data.get("books") or []:
+            isbn = normalize_isbn(str(book.get("isbn", ""))) or str(book.get("isbn", ""))
+            if isbn:
+                ids = isbn_index.setdefault(isbn, [])
+                if list_id not in ids:
+                    ids.append(list_id)
+
+    return {"version": BUNDLE_VERSION, "index": index, "lists": lists, "isbn_index": isbn_index}
+
+
+def write_bundle(bundle: dict, output: Path):
+    """Write a bundle atomically as JSON or msgpack (chosen by file extension)."""
+    if output.suffix == ".msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed: pip install msgpack")
+        atomic_write_bytes(output, msgpack.packb(bundle, default=str))
+    else:
+        with AtomicFile(output) as f:
+            json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"), default=str)
+            f.commit()
+
+
+def load_bundle(path: Path) -> dict:
+    """Read a bundle written by write_bundle()."""
+    path = Path(path)
+    if path.suffix == ".msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed: pip install msgpack")
+        return msgpack.unpackb(path.read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile curated lists into a single bundle")
+    parser.add_argument("--path", type=Path, default=Path("../assets/curated_lists"), help="Path to curated lists directory")
+    parser.add_argument("--output", type=Path, required=True, help="Bundle file (.json or .msgpack)")
+    args = parser.parse_args()
+
+    curated_path = args.path
+    if not curated_path.exists():
+        # Try relative to script location
+        curated_path = Path(__file__).parent.parent / "assets" / "curated_lists"
+
+    errors = []
+    bundle = build_bundle(curated_path, errors)
+    for filepath, message in errors:
+        print(f"⚠ Skipped {filepath.relative_to(curated_path)}: {message}")
+
+    write_bundle(bundle, args.output)
+    print(f"📦 Bundled {len(bundle['lists'])} lists, {len(bundle['isbn_index'])} distinct ISBNs into {args.output}")
+    print(f"YAML loader: {SafeLoader.__name__}")
+    if errors:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
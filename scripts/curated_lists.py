@@ -0,0 +1,91 @@
+"""
+Lazy access to BiblioGenius curated lists through index.yml.
+
+index.yml is read once; a list is only parsed the first time it is asked
+for, and parsed lists are kept in a small LRU so memory stays bounded when
+walking the whole catalogue. Lists live at <category>/<list id>.yml, the
+same layout the app's CuratedListsService resolves.
+
+    catalog = CuratedLists()
+    for list_id, book in catalog.iter_entries(category="awards"):
+        print(list_id, book["isbn"])
+
+Parsed lists are shared between callers and must be treated as read-only.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+
+from curated_bundle import load_yaml
+
+DEFAULT_ROOT = Path(__file__).parent.parent / "assets" / "curated_lists"
+
+
+class CuratedLists:
+    """Index-driven catalogue of curated lists with lazily loaded contents."""
+
+    def __init__(self, root: Path = DEFAULT_ROOT, cache_size: int = 32):
+        self.root = Path(root)
+        with open(self.root / "index.yml", "r", encoding="utf-8") as f:
+            self.index = load_yaml(f) or {}
+        self._paths = {}
+        for category in self.index.get("categories") or []:
+            for list_id in category.get("lists") or []:
+                self._paths.setdefault(list_id, self.root / category["id"] / f"{list_id}.yml")
+        self._load = lru_cache(maxsize=cache_size)(self._parse)
+
+    def __contains__(self, list_id: str) -> bool:
+        return list_id in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def categories(self) -> list:
+        """Category records from index.yml (id, title, icon, lists)."""
+        return list(self.index.get("categories") or [])
+
+    def list_ids(self, category: str = None) -> list:
+        """Ids of every indexed list, or of one category's lists, in index order."""
+        if category is None:
+            return list(self._paths)
+        for record in self.categories():
+            if record["id"] == category:
+                return list(record.get("lists") or [])
+        raise KeyError(f"Unknown category: {category}")
+
+    def path(self, list_id: str) -> Path:
+        """YAML file of a list."""
+        try:
+            return self._paths[list_id]
+        except KeyError:
+            raise KeyError(f"Unknown list: {list_id}") from None
+
+    def _parse(self, list_id: str) -> Optional[dict]:
+        path = self.path(list_id)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return load_yaml(f)
+
+    def get(self, list_id: str) -> Optional[dict]:
+        """Parsed list, loaded on first access; None if the indexed file is missing."""
+        return self._load(list_id)
+
+    def iter_entries(self, list_ids: list = None, category: str = None) -> Iterator[tuple]:
+        """Yield (list_id, book) for the given lists (default: every list), one list at a time."""
+        if list_ids is None:
+            list_ids = self.list_ids(category)
+        for list_id in list_ids:
+            data = self.get(list_id)
+            for book in (data or {}).get("books") or []:
+                yield list_id, book
+
+    def cache_info(self):
+        return self._load.cache_info()
+
+    def clear_cache(self):
+        self._load.cache_clear()
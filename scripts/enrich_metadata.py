@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Metadata sidecars for BiblioGenius curated lists.
+
+Pre-resolves title, authors, cover IDs, page count and language for every
+entry of a list and stores them in a compact <list>.meta.json next to the
+YAML, so clients can render a list without one lookup per book.
+
+Editions are fetched in bulk from the Open Library Books API under the same
+rate limiter, retries and lookup cache as validate_isbns.py. Runs are
+incremental: a sidecar whose list is unchanged is skipped, and only ISBNs
+missing from an existing sidecar are fetched.
+
+Usage:
+    python enrich_metadata.py
+    python enrich_metadata.py --path ../assets/curated_lists/awards --rps 1
+    python enrich_metadata.py --offline-index offline.sqlite3
+    python enrich_metadata.py --no-cache --replay recordings/
+
+Dependencies: pip install requests pyyaml
+"""
+
+import argparse
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+try:
+    import requests  # noqa: F401  (used through http_client)
+    import yaml
+except ImportError:
+    print("Please install dependencies: pip install requests pyyaml")
+    exit(1)
+
+from atomic_file import AtomicFile
+from curated_bundle import find_list_files, load_yaml
+from http_client import HTTPClient, TransientError
+from http_replay import open_replay
+from isbn_utils import normalize_isbn
+from lookup_cache import LookupCache, open_cache
+from offline_index import OfflineIndex
+from rate_limit import TokenBucket
+
+OPEN_LIBRARY_BOOKS = "https://openlibrary.org/api/books"
+
+SIDECAR_VERSION = 1
+
+# Cache to avoid repeated API calls; made persistent from --cache-dir in main()
+lookup_cache = LookupCache(directory=None)
+
+# Shared across batch threads; reconfigured from --rps in main()
+rate_limiter = TokenBucket(rate=2.0)
+
+# Pooled, rate-limited client with retries; rebuilt in main()
+session = HTTPClient(rate_limiter=rate_limiter)
+
+# Local dump index used instead of the network (--offline-index)
+offline_index = None
+
+
+def sidecar_path(filepath: Path) -> Path:
+    """Sidecar file for a list, e.g. prix-goncourt.yml -> prix-goncourt.meta.json."""
+    return filepath.with_suffix(".meta.json")
+
+
+def parse_details(details: dict) -> dict:
+    """Compact metadata from an Open Library Books API `details` record."""
+    languages = [lang.get("key", "").rsplit("/", 1)[-1] for lang in details.get("languages", [])]
+    metadata = {
+        "title": details.get("title", ""),
+        "authors": [a["name"] for a in details.get("authors", []) if a.get("name")],
+        "covers": [c for c in details.get("covers", []) if isinstance(c, int) and c > 0],
+        "pages": details.get("number_of_pages"),
+        "language": languages[0] if languages else None,
+    }
+    return {key: value for key, value in metadata.items() if value}
+
+
+def _offline_metadata(isbn13: str) -> Optional[dict]:
+    edition = offline_index.edition(isbn13)
+    if not edition:
+        return None
+    return {key: value for key, value in {"title": edition["title"], "authors": edition["authors"]}.items() if value}
+
+
+def fetch_metadata_batch(isbns: list) -> dict:
+    """Metadata for ISBN-13s, keyed by ISBN; unknown editions map to None.
+
+    ISBNs whose request failed transiently are left out, so a later run
+    asks again.
+    """
+    results = {}
+    missing = []
+    for isbn in isbns:
+        hit, cached = lookup_cache.get("meta", isbn)
+        if hit:
+            results[isbn] = cached
+        else:
+            missing.append(isbn)
+    if not missing:
+        return results
+
+    if offline_index:
+        for isbn in missing:
+            results[isbn] = _offline_metadata(isbn)
+        return results
+
+    try:
+        params = {"bibkeys": ",".join(f"ISBN:{isbn}" for isbn in missing), "format": "json", "jscmd": "details"}
+        response = session.get(OPEN_LIBRARY_BOOKS, params=params, timeout=30)
+        if response.status_code != 200:
+            print(f"  Error fetching metadata: HTTP {response.status_code}")
+            return results
+        data = response.json()
+    except (TransientError, ValueError) as e:
+        print(f"  Error fetching metadata: {e}")
+        return results
+
+    for isbn in missing:
+        record = data.get(f"ISBN:{isbn}")
+        metadata = parse_details(record.get("details", {})) if record else None
+        lookup_cache.set("meta", isbn, metadata)
+        results[isbn] = metadata
+    return results
+
+
+def file_digest(filepath: Path) -> str:
+    """SHA-256 of a file's bytes."""
+    return hashlib.sha256(filepath.read_bytes()).hexdigest()
+
+
+def load_sidecar(path: Path) -> dict:
+    """Existing sidecar, or an empty one."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar.get("version") == SIDECAR_VERSION:
+            return sidecar
+    except (OSError, ValueError):
+        pass
+    return {"version": SIDECAR_VERSION, "source_sha256": None, "books": {}}
+
+
+def write_sidecar(path: Path, sidecar: dict):
+    """Write a sidecar atomically in compact JSON."""
+    with AtomicFile(path) as f:
+        json.dump(sidecar, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        f.commit()
+
+
+def enrich_file(filepath: Path, executor: ThreadPoolExecutor, batch_size: int = 50, force: bool = False) -> Optional[dict]:
+    """Bring one list's sidecar up to date; returns stats, or None if it was current."""
+    digest = file_digest(filepath)
+    path = sidecar_path(filepath)
+    sidecar = load_sidecar(path)
+    if sidecar["source_sha256"] == digest and not force:
+        return None
+
+    with open(filepath, "r", encoding="utf-8") as f:
+        data = load_yaml(f) or {}
+    isbns = []
+    for book in data.get("books") or []:
+        isbn13 = normalize_isbn(str(book.get("isbn", "")))
+        if isbn13 and isbn13 not in isbns:
+            isbns.append(isbn13)
+
+    known = {} if force else {isbn: sidecar["books"][isbn] for isbn in isbns if isbn in sidecar["books"]}
+    missing = [isbn for isbn in isbns if isbn not in known]
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+
+    fetched = {}
+    for results in executor.map(fetch_metadata_batch, batches):
+        fetched.update(results)
+    failed = sum(1 for isbn in missing if isbn not in fetched)
+
+    books = {**known, **{isbn: metadata for isbn, metadata in fetched.items() if metadata}}
+    sidecar = {
+        "version": SIDECAR_VERSION,
+        # Only mark the sidecar current when nothing failed transiently
+        "source_sha256": None if failed else digest,
+        "books": {isbn: books[isbn] for isbn in isbns if isbn in books},
+    }
+    write_sidecar(path, sidecar)
+    return {"isbns": len(isbns), "reused": len(known), "fetched": len(missing), "resolved": len(sidecar["books"]), "failed": failed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write metadata sidecars for curated lists")
+    parser.add_argument("--path", type=Path, default=Path("../assets/curated_lists"), help="Curated lists directory (or a sub-directory)")
+    parser.add_argument("--rps", type=float, default=2.0, help="Maximum Open Library requests per second")
+    parser.add_argument("--concurrency", type=int, default=2, help="Number of batch requests run at once")
+    parser.add_argument("--batch-size", type=int, default=50, help="ISBNs per Open Library Books API request")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Directory for the persistent lookup cache (default: ~/.cache/bibliogenius-lists)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the persistent lookup cache")
+    parser.add_argument("--offline-index", type=Path, default=None, help="Take titles and authors from an index built by offline_index.py instead of the network")
+    parser.add_argument("--record", type=Path, default=None, help="Save every HTTP response to this record/replay store")
+    parser.add_argument("--replay", type=Path, default=None, help="Answer HTTP requests from a store written by --record, without the network")
+    parser.add_argument("--replay-latency", type=float, default=0.0, help="Artificial delay in seconds added to each replayed response")
+    parser.add_argument("--force", action="store_true", help="Refetch every entry, even for unchanged lists")
+    args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be combined")
+
+    global lookup_cache, rate_limiter, session, offline_index
+    lookup_cache = open_cache(args.cache_dir, args.no_cache)
+    rate_limiter = TokenBucket(rate=args.rps)
+    replay = open_replay(args.record, args.replay, args.replay_latency)
+    session = HTTPClient(rate_limiter=rate_limiter, pool_size=max(args.concurrency, 1), replay=replay)
+    if args.offline_index:
+        offline_index = OfflineIndex(args.offline_index)
+
+    curated_path = args.path
+    if not curated_path.exists():
+        # Try relative to script location
+        curated_path = Path(__file__).parent.parent / "assets" / "curated_lists"
+
+    totals = {"lists": 0, "current": 0, "isbns": 0, "fetched": 0, "resolved": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        for filepath in find_list_files(curated_path):
+            try:
+                stats = enrich_file(filepath, executor, args.batch_size, args.force)
+            except yaml.YAMLError as e:
+                print(f"⚠ Skipped {filepath.name}: {str(e).splitlines()[0]}")
+                continue
+            totals["lists"] += 1
+            if stats is None:
+                totals["current"] += 1
+                continue
+            print(f"📚 {filepath.name}: {stats['resolved']}/{stats['isbns']} resolved ({stats['reused']} reused, {stats['fetched']} fetched)")
+            for key in ("isbns", "fetched", "resolved", "failed"):
+                totals[key] += stats[key]
+
+    print(f"\n{totals['lists']} lists, {totals['current']} already current")
+    print(f"{totals['resolved']} entries with metadata, {totals['fetched']} ISBNs looked up, {totals['failed']} failed (retried next run)")
+    for line in session.report():
+        print(f"HTTP {line}")
+    lookup_cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,24 +9,92 @@ Usage:
     python generate_from_wikidata.py --prize nobel --output ../bibliogenius-app/assets/curated_lists/awards/
     python generate_from_wikidata.py --prize goncourt --years 2000-2024
     python generate_from_wikidata.py --author "Gabriel García Márquez"
+    python generate_from_wikidata.py --all-prizes --batch-size 6
+    python generate_from_wikidata.py --authors-file authors.txt --concurrency 3
+    python generate_from_wikidata.py --all-prizes --no-cache --replay recordings/
+    python generate_from_wikidata.py --all-prizes --sparql-cache-ttl 6
+    python generate_from_wikidata.py --all-prizes --queue /shared/queue.sqlite --jobs 4
+    python generate_from_wikidata.py --queue /shared/queue.sqlite --worker --output ../assets/curated_lists/awards/
+
+Prize winners without an ISBN on Wikidata are looked up through their
+edition items (P747), then by title/author on Open Library, unless
+--no-fill-isbns is given.
+
+Existing lists are merged rather than overwritten (see list_merge.py):
+manual edits are kept, unchanged lists are not rewritten, and --changes
+writes a manifest of what changed for validate_isbns.py --changes.
 """
 
 import argparse
+import io
 import json
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 from urllib.parse import quote
 
 try:
     import requests
+    import yaml
 except ImportError:
-    print("Please install requests: pip install requests")
+    print("Please install dependencies: pip install requests pyyaml")
     sys.exit(1)
 
+from atomic_file import AtomicFile
+from curated_bundle import dump_yaml
+from http_client import HTTPClient, TransientError
+from http_replay import open_replay
+from isbn_utils import normalize_isbn
+from list_merge import (
+    ChangeManifest, content_digest, entry_isbn, file_content_digest, generated_ids, merge_entries, merge_list_fields, read_list
+)
+from lookup_cache import LookupCache, normalize_key, open_cache
+from matching import Match, MatchIndex, candidates_from_docs, infer_language
+from metrics import Metrics, ProgressReporter
+from offline_index import OfflineIndex
+from rate_limit import TokenBucket
+from work_queue import JobFailed, QueuedJob, WorkQueue, run_worker, watch_workers
+
 WIKIDATA_ENDPOINT = "https://query.wikidata.org/sparql"
+OPEN_LIBRARY_SEARCH = "https://openlibrary.org/search.json"
+
+# Shared with validate_isbns.py when both point at the same --cache-dir
+lookup_cache = LookupCache(directory=None)
+
+# Local dump index used instead of the SPARQL endpoint (--offline-index)
+offline_index = None
+
+# Shared by concurrent batch queries; reconfigured from --rps in main()
+rate_limiter = TokenBucket(rate=2.0)
+
+# Pooled, rate-limited client with retries; rebuilt in main()
+session = HTTPClient(rate_limiter=rate_limiter)
+
+# Rows fetched per paginated SPARQL request (--page-size)
+page_size = 500
+
+# Seconds complete SPARQL results stay in the lookup cache; 0 disables (--sparql-cache-ttl)
+sparql_cache_ttl = 0
+
+# Per-phase counters and latencies for --metrics-json and --progress
+metrics = Metrics()
+
+# Resolve missing ISBNs of prize winners before writing (--no-fill-isbns)
+fill_isbns = True
+fill_concurrency = 2
+
+# Open Library matches scoring below this are not used (--min-confidence)
+min_confidence = 0.6
+
+# Merge into existing list files instead of replacing them (--overwrite)
+merge_existing = True
+
+# Lists created, updated, unchanged or failed in this run (--changes)
+changes = ChangeManifest()
 
 # Prize IDs in Wikidata
 PRIZES = {
@@ -123,86 +191,158 @@ PRIZES = {
 }
 
 
+class QueryFailed(Exception):
+    """A Wikidata query that could not be answered; lists built from it are not written."""
+
+
 def query_wikidata(sparql: str) -> list:
-    """Execute a SPARQL query against Wikidata."""
+    """Execute a SPARQL query against Wikidata; raises QueryFailed."""
     headers = {
         "Accept": "application/json",
         "User-Agent": "BiblioGenius List Generator/1.0"
     }
     
     try:
-        response = requests.get(
-            WIKIDATA_ENDPOINT,
-            params={"query": sparql, "format": "json"},
-            headers=headers,
-            timeout=60
-        )
-        response.raise_for_status()
+        metrics.incr("requests")
+        with metrics.timer("sparql"):
+            response = session.get(
+                WIKIDATA_ENDPOINT,
+                params={"query": sparql, "format": "json"},
+                headers=headers,
+                timeout=60
+            )
+        if response.status_code != 200:
+            raise QueryFailed(f"HTTP {response.status_code}")
         data = response.json()
-        return data.get("results", {}).get("bindings", [])
-    except requests.RequestException as e:
-        print(f"Error querying Wikidata: {e}")
-        return []
+    except (TransientError, ValueError) as e:
+        raise QueryFailed(str(e)) from e
+    
+    bindings = data.get("results", {}).get("bindings", [])
+    metrics.incr("rows", len(bindings))
+    return bindings
 
 
-def get_prize_winners(prize_id: str, start_year: int = 1900, end_year: int = 2025) -> list:
-    """Get books that won a specific prize."""
+def sparql_string(text: str) -> str:
+    """Quote a Python string as a SPARQL string literal."""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def clean_isbn(isbn: str) -> str:
+    """Strip hyphens and spaces from a Wikidata ISBN value."""
+    return re.sub(r'[^0-9X]', '', isbn.upper()) if isbn else isbn
+
+
+def _binding_value(item: dict, name: str, default: str = "") -> str:
+    return item.get(name, {}).get("value", default)
+
+
+def iter_wikidata(sparql: str) -> Iterator[dict]:
+    """Stream the bindings of an ordered SPARQL query page by page.
+
+    Only one page of results is held in memory at a time. A page that
+    fails raises QueryFailed rather than ending the results early.
+
+    With --sparql-cache-ttl, whole results are cached once their last page
+    is fetched, so a run never mixes pages fetched at different times.
+    """
+    cache_key = normalize_key(sparql)
+    if sparql_cache_ttl:
+        hit, cached = lookup_cache.get("sparql", cache_key)
+        if hit:
+            yield from cached
+            return
     
-    # Query for works that received the prize
+    rows = [] if sparql_cache_ttl else None
+    offset = 0
+    while True:
+        page = query_wikidata(f"{sparql}\nLIMIT {page_size} OFFSET {offset}")
+        yield from page
+        if rows is not None:
+            rows += page
+        if len(page) < page_size:
+            break
+        offset += page_size
+    if rows is not None:
+        lookup_cache.set("sparql", cache_key, rows, ttl=sparql_cache_ttl)
+
+
+def _in_years(year: str, start_year: int, end_year: int) -> bool:
+    """Undated works are kept, as the SPARQL filter does."""
+    return not year or start_year <= int(year) <= end_year
+
+
+def iter_prize_winners(prize_ids: list, start_year: int = 1900, end_year: int = 2025) -> Iterator[tuple]:
+    """Yield (prize_id, book) for works that received any of the prizes."""
+    if offline_index:
+        for prize_id in prize_ids:
+            for book in offline_index.prize_winners(prize_id):
+                if _in_years(book["year"], start_year, end_year):
+                    yield prize_id, book
+        return
+    
+    values = " ".join(f"wd:{prize_id}" for prize_id in prize_ids)
+    
+    # Query for works that received any of the prizes
     sparql = f"""
-    SELECT DISTINCT ?work ?workLabel ?authorLabel ?year ?isbn13 ?isbn10 WHERE {{
-      ?work wdt:P166 wd:{prize_id} .  # received award
+    SELECT DISTINCT ?prize ?work ?workLabel ?authorLabel ?year ?isbn13 ?isbn10 WHERE {{
+      VALUES ?prize {{ {values} }}
+      ?work wdt:P166 ?prize .          # received award
       ?work wdt:P50 ?author .          # has author
       
       OPTIONAL {{ ?work wdt:P577 ?pubDate . BIND(YEAR(?pubDate) AS ?year) }}
+      FILTER(!BOUND(?year) || (?year >= {start_year} && ?year <= {end_year}))
       OPTIONAL {{ ?work wdt:P212 ?isbn13 . }}  # ISBN-13
       OPTIONAL {{ ?work wdt:P957 ?isbn10 . }}  # ISBN-10
       
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "fr,en,de,es" . }}
     }}
-    ORDER BY DESC(?year)
-    LIMIT 100
-    """
+    ORDER BY ?prize DESC(?year) ?work ?isbn13 ?isbn10"""
     
-    results = query_wikidata(sparql)
-    
-    books = []
     seen_works = set()
     
-    for item in results:
-        work_id = item.get("work", {}).get("value", "")
-        if work_id in seen_works:
+    for item in iter_wikidata(sparql):
+        prize_id = _binding_value(item, "prize").split("/")[-1]
+        work_id = _binding_value(item, "work")
+        if (prize_id, work_id) in seen_works:
             continue
-        seen_works.add(work_id)
-        
-        title = item.get("workLabel", {}).get("value", "Unknown")
-        author = item.get("authorLabel", {}).get("value", "Unknown")
-        year = item.get("year", {}).get("value", "")
-        isbn13 = item.get("isbn13", {}).get("value", "")
-        isbn10 = item.get("isbn10", {}).get("value", "")
-        
-        isbn = isbn13 or isbn10
-        if isbn:
-            # Clean ISBN (remove hyphens)
-            isbn = re.sub(r'[^0-9X]', '', isbn.upper())
+        seen_works.add((prize_id, work_id))
         
-        books.append({
-            "title": title,
-            "author": author,
-            "year": year,
-            "isbn": isbn,
+        yield prize_id, {
+            "title": _binding_value(item, "workLabel", "Unknown"),
+            "author": _binding_value(item, "authorLabel", "Unknown"),
+            "year": _binding_value(item, "year"),
+            "isbn": clean_isbn(_binding_value(item, "isbn13") or _binding_value(item, "isbn10")),
             "wikidata_id": work_id.split("/")[-1] if work_id else None
-        })
-    
+        }
+
+
+def get_prize_winners(prize_id: str, start_year: int = 1900, end_year: int = 2025) -> list:
+    """Get books that won a specific prize."""
+    return [book for _, book in iter_prize_winners([prize_id], start_year, end_year)]
+
+
+def get_prize_winners_batch(prize_ids: list, start_year: int = 1900, end_year: int = 2025) -> dict:
+    """Get prize winners for several prizes in one query, keyed by prize id."""
+    books = {prize_id: [] for prize_id in prize_ids}
+    for prize_id, book in iter_prize_winners(prize_ids, start_year, end_year):
+        books[prize_id].append(book)
     return books
 
 
-def get_author_works(author_name: str) -> list:
-    """Get notable works by an author."""
+def iter_author_works(author_names: list) -> Iterator[tuple]:
+    """Yield (author_name, book) for literary works by any of the authors."""
+    if offline_index:
+        for name in author_names:
+            for book in offline_index.author_works(name):
+                yield name, book
+        return
+    
+    values = " ".join(f"{sparql_string(name)}@en" for name in author_names)
     
     sparql = f"""
-    SELECT DISTINCT ?work ?workLabel ?year ?isbn13 ?isbn10 WHERE {{
-      ?author rdfs:label "{author_name}"@en .
+    SELECT DISTINCT ?authorName ?work ?workLabel ?year ?isbn13 ?isbn10 WHERE {{
+      VALUES ?authorName {{ {values} }}
+      ?author rdfs:label ?authorName .
       ?work wdt:P50 ?author .
       ?work wdt:P31 wd:Q7725634 .  # instance of literary work
       
@@ -212,33 +352,198 @@ def get_author_works(author_name: str) -> list:
       
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "fr,en,de,es" . }}
     }}
-    ORDER BY ?year
-    LIMIT 50
-    """
+    ORDER BY ?authorName ?year ?work ?isbn13 ?isbn10"""
     
-    results = query_wikidata(sparql)
+    seen_works = set()
     
-    books = []
-    for item in results:
-        title = item.get("workLabel", {}).get("value", "Unknown")
-        year = item.get("year", {}).get("value", "")
-        isbn13 = item.get("isbn13", {}).get("value", "")
-        isbn10 = item.get("isbn10", {}).get("value", "")
-        
-        isbn = isbn13 or isbn10
-        if isbn:
-            isbn = re.sub(r'[^0-9X]', '', isbn.upper())
+    for item in iter_wikidata(sparql):
+        author_name = _binding_value(item, "authorName")
+        work_id = _binding_value(item, "work")
+        if (author_name, work_id) in seen_works:
+            continue
+        seen_works.add((author_name, work_id))
         
-        books.append({
-            "title": title,
+        yield author_name, {
+            "title": _binding_value(item, "workLabel", "Unknown"),
             "author": author_name,
-            "year": year,
-            "isbn": isbn
-        })
-    
+            "year": _binding_value(item, "year"),
+            "isbn": clean_isbn(_binding_value(item, "isbn13") or _binding_value(item, "isbn10")),
+            "wikidata_id": work_id.split("/")[-1] if work_id else None
+        }
+
+
+def get_author_works(author_name: str) -> list:
+    """Get notable works by an author."""
+    return [book for _, book in iter_author_works([author_name])]
+
+
+def get_author_works_batch(author_names: list) -> dict:
+    """Get works for several authors in one query, keyed by author name."""
+    books = {name: [] for name in author_names}
+    for name, book in iter_author_works(author_names):
+        books[name].append(book)
     return books
 
 
+def fetch_in_batches(fetch, keys: list, batch_size: int, concurrency: int, failed: dict = None) -> dict:
+    """Run a *_batch fetcher over keys in chunks, concurrently, and merge results.
+
+    A failed query raises QueryFailed, unless a `failed` dict is given: the
+    keys of the failed batch are then mapped to the error and left out of
+    the results, and the other batches are kept.
+    """
+    batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+    
+    def attempt(batch):
+        try:
+            return fetch(batch), None
+        except QueryFailed as e:
+            if failed is None:
+                raise
+            return {}, e
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for batch, (batch_result, error) in zip(batches, executor.map(attempt, batches)):
+            results.update(batch_result)
+            if error:
+                failed.update(dict.fromkeys(batch, error))
+    return results
+
+
+def edition_isbns(work_ids: list) -> dict:
+    """ISBN-13 of an edition item (P747) of each work that has one, keyed by work id."""
+    values = " ".join(f"wd:{work_id}" for work_id in work_ids)
+    
+    sparql = f"""
+    SELECT ?work ?isbn13 ?isbn10 WHERE {{
+      VALUES ?work {{ {values} }}
+      ?work wdt:P747 ?edition .             # has edition or translation
+      OPTIONAL {{ ?edition wdt:P212 ?isbn13 . }}
+      OPTIONAL {{ ?edition wdt:P957 ?isbn10 . }}
+      FILTER(BOUND(?isbn13) || BOUND(?isbn10))
+    }}
+    ORDER BY ?work ?isbn13 ?isbn10"""
+    
+    found = {}
+    for item in iter_wikidata(sparql):
+        work_id = _binding_value(item, "work").split("/")[-1]
+        isbn13 = normalize_isbn(_binding_value(item, "isbn13"))
+        isbn = isbn13 or normalize_isbn(_binding_value(item, "isbn10"))
+        # Prefer an edition recorded with a real ISBN-13
+        if isbn and (work_id not in found or (isbn13 and not found[work_id][1])):
+            found[work_id] = (isbn, bool(isbn13))
+    return {work_id: isbn for work_id, (isbn, _) in found.items()}
+
+
+def search_open_library(title: str, author: str = None, language: str = None) -> Match:
+    """Best-scoring Open Library ISBN-13 for a title and author.
+
+    Results share the "match" cache namespace with validate_isbns.py.
+    """
+    query = f"{title} {author}" if author else title
+    cache_key = f"{normalize_key(query)}|{language or ''}"
+    hit, cached = lookup_cache.get("match", cache_key)
+    if hit:
+        return Match(*cached) if cached else Match(None, 0.0)
+    
+    try:
+        params = {"q": query, "limit": 20, "fields": "isbn,title,author_name,language"}
+        metrics.incr("requests")
+        with metrics.timer("search"):
+            response = session.get(OPEN_LIBRARY_SEARCH, params=params, timeout=10)
+        if response.status_code != 200:
+            print(f"  Error searching for '{query}': HTTP {response.status_code}")
+            return Match(None, 0.0)
+        data = response.json()
+    except (TransientError, ValueError) as e:
+        print(f"  Error searching for '{query}': {e}")
+        return Match(None, 0.0)
+    
+    match = MatchIndex(candidates_from_docs(data.get("docs", []))).best_match(title, author, language)
+    lookup_cache.set("match", cache_key, [match.isbn, match.confidence] if match.isbn else None)
+    return match
+
+
+def fill_missing_isbns(lists: list, batch_size: int = 100, settled: list = None) -> dict:
+    """Give ISBNs to works that have none, in place, before their lists are written.
+
+    `lists` holds the books of each list, and `settled` the wikidata_ids
+    each list file already has an entry for (see settled_ids()), which are
+    skipped. Works are looked up through their edition items in SPARQL
+    queries batched across all lists; the rest are searched on Open Library
+    by title and author, preferring the edition language of their own list.
+    All lookups go through the shared rate limiter. Filling is best effort:
+    works whose edition query failed are left unresolved for the next run.
+    """
+    settled = settled or [frozenset()] * len(lists)
+    todo = [
+        [book for book in books if not book.get("isbn") and book.get("wikidata_id") and book["wikidata_id"] not in done]
+        for books, done in zip(lists, settled)
+    ]
+    missing = [book for books in todo for book in books]
+    counts = {"missing": len(missing), "editions": 0, "search": 0}
+    if not missing or offline_index:
+        # The offline index already takes ISBNs from every known edition
+        return counts
+    
+    work_ids = sorted({book["wikidata_id"] for book in missing})
+    failed = {}
+    editions = fetch_in_batches(edition_isbns, work_ids, batch_size, fill_concurrency, failed)
+    if failed:
+        print(f"  ⚠ Edition lookup failed for {len(failed)} works, left unresolved: {next(iter(failed.values()))}")
+    
+    for book in missing:
+        isbn = editions.get(book["wikidata_id"])
+        if isbn:
+            book["isbn"] = isbn
+            counts["editions"] += 1
+    
+    unresolved = []
+    for books, pending in zip(lists, todo):
+        # Search in the edition language most of the list already uses
+        language = infer_language([book["isbn"] for book in books if book.get("isbn")])
+        unresolved += [
+            (book, language) for book in pending
+            if not book.get("isbn") and book["wikidata_id"] not in failed
+            and not re.fullmatch(r"Q\d+", book["title"]) and book["title"] != "Unknown"
+        ]
+    
+    def search(item):
+        book, language = item
+        author = book["author"] if book["author"] != "Unknown" else None
+        return search_open_library(book["title"], author, language)
+    
+    with ThreadPoolExecutor(max_workers=max(1, fill_concurrency)) as executor:
+        matches = executor.map(search, unresolved)
+        for (book, _), match in zip(unresolved, matches):
+            if match.isbn and match.confidence >= min_confidence:
+                book["isbn"] = match.isbn
+                counts["search"] += 1
+    return counts
+
+
+def settled_ids(output_file: Path) -> set:
+    """wikidata_ids a list file has an ISBN for or had removed by hand; gap-filling skips them."""
+    if not merge_existing:
+        return set()
+    try:
+        existing = read_list(output_file) or {}
+    except yaml.YAMLError:
+        # write_yaml_list reports it
+        return set()
+    entries = existing.get("books") or []
+    with_isbn = {str(e["wikidata_id"]) for e in entries if isinstance(e, dict) and e.get("wikidata_id") and e.get("isbn")}
+    return with_isbn | generated_ids(existing)
+
+
+def report_filled(counts: dict):
+    if counts["missing"]:
+        filled = counts["editions"] + counts["search"]
+        print(f"  Filled {filled} of {counts['missing']} missing ISBNs "
+              f"({counts['editions']} from Wikidata editions, {counts['search']} from Open Library)")
+
+
 def generate_yaml(
     list_id: str,
     title: dict,
@@ -248,47 +553,187 @@ def generate_yaml(
     tags: list = None
 ) -> str:
     """Generate YAML content for a curated list."""
+    return "\n".join(iter_yaml_lines(list_id, title, description, books, contributor, tags))
+
+
+def book_entry(book: dict):
+    """List entry for a fetched book; entries read from a list file pass through."""
+    if not isinstance(book, dict) or "author" not in book:
+        return book
+    entry = {}
+    if book.get("isbn"):
+        note = f"{book['title']} - {book['author']}"
+        if book.get("year"):
+            note += f" ({book['year']})"
+        entry = {"isbn": book["isbn"], "note": note}
+    elif book.get("wikidata_id"):
+        # Written as a comment, so never merged into an existing entry
+        entry = {"unresolved": f"{book['title']} - {book['author']}"}
+    if book.get("wikidata_id"):
+        entry["wikidata_id"] = book["wikidata_id"]
+    return entry
+
+
+def iter_entry_lines(entry) -> Iterator[str]:
+    """Lines of one list entry, keeping any manually added fields."""
+    if not isinstance(entry, dict):
+        yield f'  - "{escape_yaml(str(entry))}"'
+        return
+    if not entry.get("isbn"):
+        if entry.get("unresolved"):
+            # Fallback: use Wikidata ID if no ISBN
+            yield f'  # No ISBN found: {entry["unresolved"]}'
+            yield f'  # Wikidata: {entry["wikidata_id"]}'
+        elif entry:
+            # A hand-added entry without an ISBN, kept as it is
+            lines = dump_yaml(entry).splitlines()
+            yield "  - " + lines[0]
+            yield from ("    " + line for line in lines[1:])
+        return
+    yield f'  - isbn: "{escape_yaml(str(entry["isbn"]))}"'
+    if entry.get("note"):
+        yield f'    note: "{escape_yaml(str(entry["note"]))}"'
+    if entry.get("wikidata_id"):
+        yield f'    wikidata_id: {entry["wikidata_id"]}'
+    extra = {key: value for key, value in entry.items() if key not in ("isbn", "note", "wikidata_id")}
+    if extra:
+        yield from ("    " + line for line in dump_yaml(extra).splitlines())
+
+
+def iter_yaml_lines(
+    list_id: str,
+    title: dict,
+    description: dict,
+    books: Iterable[dict],
+    contributor: str = "BiblioGenius (Wikidata)",
+    tags: list = None,
+    version: int = 1,
+    extra: dict = None,
+    wikidata_ids: set = None
+) -> Iterator[str]:
+    """Yield the lines of a curated list, consuming books lazily.
+    
+    Books may be fetched books or entries of an existing list; `extra`
+    holds list fields the generator does not write itself (e.g. cover_url).
+    With a `wikidata_ids` set, the ids of the entries written are added to
+    it and the set is written after the books (see list_merge.py).
+    """
     
-    lines = [
+    yield from [
         f"# Auto-generated from Wikidata",
         f"# Generated: {datetime.now().isoformat()}",
         "",
         f"id: {list_id}",
-        "version: 1",
+        f"version: {version}",
         "",
         "title:"
     ]
     
     for lang, text in title.items():
-        lines.append(f'  {lang}: "{escape_yaml(text)}"')
+        yield f'  {lang}: "{escape_yaml(text)}"'
     
-    lines.append("")
-    lines.append("description:")
+    yield ""
+    yield "description:"
     for lang, text in description.items():
-        lines.append(f'  {lang}: "{escape_yaml(text)}"')
+        yield f'  {lang}: "{escape_yaml(text)}"'
     
-    lines.append("")
-    lines.append(f'contributor: "{contributor}"')
+    yield ""
+    yield f'contributor: "{contributor}"'
     
     if tags:
-        lines.append(f"tags: [{', '.join(tags)}]")
+        yield f"tags: [{', '.join(map(str, tags))}]"
+    
+    if extra:
+        yield ""
+        yield from dump_yaml(extra).splitlines()
     
-    lines.append("")
-    lines.append("books:")
+    yield ""
+    yield "books:"
     
     for book in books:
-        if book.get("isbn"):
-            note = f"{book['title']} - {book['author']}"
-            if book.get("year"):
-                note += f" ({book['year']})"
-            lines.append(f'  - isbn: "{book["isbn"]}"')
-            lines.append(f'    note: "{escape_yaml(note)}"')
-        elif book.get("wikidata_id"):
-            # Fallback: use Wikidata ID if no ISBN
-            lines.append(f'  # No ISBN found: {book["title"]} - {book["author"]}')
-            lines.append(f'  # Wikidata: {book["wikidata_id"]}')
+        entry = book_entry(book)
+        if wikidata_ids is not None and isinstance(entry, dict) and entry.get("isbn") and entry.get("wikidata_id"):
+            wikidata_ids.add(str(entry["wikidata_id"]))
+        yield from iter_entry_lines(entry)
+    
+    if wikidata_ids:
+        yield ""
+        yield "# Works this list was written with; removing an entry keeps it out of regenerations"
+        yield "wikidata_ids:"
+        for qid in sorted(wikidata_ids, key=lambda qid: (len(qid), qid)):
+            yield f"  - {qid}"
+
+
+def write_yaml_list(output_file: Path, books: Iterable[dict], merge: bool = True, **list_fields) -> tuple:
+    """Stream a curated list to disk; returns (books, books_with_isbn, status).
+
+    With `merge`, the books are merged into the existing file (list_merge.py).
+    The file is written to a temp path and renamed only if its content
+    changed; status is "created", "updated" or "unchanged", None when there
+    were no books, and "skipped" when the existing file could not be parsed.
+    QueryFailed from the `books` iterator propagates, with the file untouched.
+    """
+    counts = [0, 0]
+    delta = {"added": [], "updated": []}
+    isbns = []
+    entries = (book_entry(book) for book in books)
+    
+    existing = None
+    written_ids = set()
+    if merge:
+        try:
+            existing = read_list(output_file)
+        except yaml.YAMLError as e:
+            print(f"  ⚠ Could not parse {output_file.name}, left untouched: {str(e).splitlines()[0]}")
+            return 0, 0, "skipped"
+    if existing is not None:
+        list_fields, extra, version = merge_list_fields(existing, list_fields)
+        list_fields.update(extra=extra, version=version)
+        written_ids = generated_ids(existing)
+        entries = merge_entries(existing.get("books") or [], entries, delta, written_ids)
     
-    return "\n".join(lines)
+    def counted(entries):
+        for entry in entries:
+            counts[0] += 1
+            if entry_isbn(entry):
+                counts[1] += 1
+                isbns.append(entry_isbn(entry))
+            yield entry
+    
+    def written(lines):
+        first = True
+        for line in lines:
+            f.write(line if first else "\n" + line)
+            first = False
+            yield line
+    
+    previous = file_content_digest(output_file)
+    # A query failing while the books are streamed in leaves the old file
+    with AtomicFile(output_file) as f:
+        with metrics.timer("write"):
+            digest = content_digest(written(iter_yaml_lines(books=counted(entries), wikidata_ids=written_ids, **list_fields)))
+        if not counts[0]:
+            status = None
+        elif digest == previous:
+            # Only the timestamp would change
+            status = "unchanged"
+        else:
+            f.commit()
+            status = "created" if previous is None else "updated"
+            if existing is None:
+                delta["added"] = isbns
+    if status:
+        changes.record(list_fields["list_id"], output_file, status, digest, delta["added"], delta["updated"])
+    metrics.incr("lists")
+    metrics.incr("books", counts[0])
+    return counts[0], counts[1], status
+
+
+def list_failed(list_id: str, output_dir: Path, error: Exception):
+    """Record a list that was not written because a query failed."""
+    output_file = output_dir / f"{list_id}.yml"
+    print(f"  ⚠ Wikidata query failed, {output_file.name} left untouched: {error}")
+    changes.record(list_id, output_file, "failed", None, error=str(error))
 
 
 def escape_yaml(text: str) -> str:
@@ -321,7 +766,14 @@ def main():
     )
     parser.add_argument(
         "--author",
-        help="Author name to generate bibliography for"
+        action="append",
+        default=[],
+        help="Author name to generate bibliography for (repeatable)"
+    )
+    parser.add_argument(
+        "--authors-file",
+        type=Path,
+        help="File with one author name per line (# for comments)"
     )
     parser.add_argument(
         "--years",
@@ -343,8 +795,141 @@ def main():
         action="store_true",
         help="Generate lists for all available prizes"
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Directory for the persistent lookup cache (default: ~/.cache/bibliogenius-lists)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent lookup cache"
+    )
+    parser.add_argument(
+        "--sparql-cache-ttl",
+        type=float,
+        default=0,
+        help="Hours to reuse cached Wikidata query results (default: 0, always query)"
+    )
+    parser.add_argument(
+        "--offline-index",
+        type=Path,
+        default=None,
+        help="Query an index built by offline_index.py instead of Wikidata"
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        help="Save every HTTP response to this record/replay store"
+    )
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        default=None,
+        help="Answer HTTP requests from a store written by --record, without the network"
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="Artificial delay in seconds added to each replayed response"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10,
+        help="Prizes or authors combined into one SPARQL query"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=2,
+        help="Number of batched queries run at once"
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=500,
+        help="Rows fetched per paginated Wikidata request"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=2.0,
+        help="Maximum Wikidata queries per second"
+    )
+    parser.add_argument(
+        "--no-fill-isbns",
+        action="store_true",
+        help="Write works without an ISBN as comments instead of looking their ISBN up"
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=0.6,
+        help="Minimum title/author match score (0-1) for an Open Library ISBN to be used"
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Replace existing lists instead of merging new results into them"
+    )
+    parser.add_argument(
+        "--changes",
+        type=Path,
+        default=None,
+        help="Write a JSON manifest of created/updated lists and their added or updated ISBNs"
+    )
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        default=None,
+        help="Share the run through this SQLite work queue; --jobs sets the local worker count (0 = coordinate only)"
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="With --queue, only generate queued lists (e.g. on another host) and exit when the queue is drained"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of queue worker processes started by this process (with --queue)"
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        help="Seconds a queue worker holds a job before another may take it over (renewed while working)"
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        default=None,
+        help="Write counters and per-phase latency histograms to this JSON file"
+    )
+    parser.add_argument(
+        "--progress",
+        type=float,
+        default=0,
+        help="Print a progress line with an ETA to stderr every N seconds (0 = off)"
+    )
+    parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="Print per-host HTTP and per-phase timing summaries at the end"
+    )
     
     args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be combined")
+    if args.worker and not args.queue:
+        parser.error("--worker needs --queue")
+    
+    configure(args, args.rps)
     
     if args.list_prizes:
         print("Available prizes:")
@@ -362,15 +947,183 @@ def main():
     # Ensure output directory exists
     args.output.mkdir(parents=True, exist_ok=True)
     
-    if args.all_prizes:
-        for prize_key in PRIZES.keys():
-            generate_prize_list(prize_key, start_year, end_year, args.output)
-    elif args.prize:
-        generate_prize_list(args.prize, start_year, end_year, args.output)
-    elif args.author:
-        generate_author_list(args.author, args.output)
+    if args.worker:
+        args.jobs = max(1, args.jobs)
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(args,)) as pool:
+            workers = [pool.submit(_queue_worker, args.queue, args.output, args.lease, args.batch_size) for _ in range(args.jobs)]
+            processed = sum(worker.result() for worker in workers)
+        print(f"Generated {processed} queued lists")
+        return
+    
+    authors = list(args.author)
+    if args.authors_file:
+        for line in args.authors_file.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                authors.append(line)
+    
+    total_lists = len(PRIZES) if args.all_prizes else 1 if args.prize else len(authors)
+    progress = ProgressReporter(
+        metrics, total_lists, unit="lists", interval=args.progress,
+        cache=lambda: (lookup_cache.hits, lookup_cache.misses)
+    ).start()
+    
+    try:
+        if args.queue and (args.all_prizes or args.prize or authors):
+            prize_keys = list(PRIZES.keys()) if args.all_prizes else [args.prize] if args.prize else []
+            run_queue(args, queue_jobs(prize_keys, [] if prize_keys else authors, start_year, end_year))
+        elif args.all_prizes:
+            generate_prize_lists(list(PRIZES.keys()), start_year, end_year, args.output, args.batch_size, args.concurrency)
+        elif args.prize:
+            generate_prize_list(args.prize, start_year, end_year, args.output)
+        elif len(authors) == 1:
+            generate_author_list(authors[0], args.output)
+        elif authors:
+            generate_author_lists(authors, args.output, args.batch_size, args.concurrency)
+        else:
+            parser.print_help()
+    finally:
+        progress.stop()
+    
+    if changes.lists:
+        counts = changes.counts()
+        print(f"\nLists: {counts['created']} created, {counts['updated']} updated, {counts['unchanged']} unchanged")
+        if counts["failed"]:
+            print(f"⚠ {counts['failed']} lists not written because a Wikidata query failed; rerun to retry them")
+    if args.changes:
+        changes.write(args.changes)
+        print(f"Changes written to {args.changes}")
+    if args.verbose:
+        for line in session.report():
+            print(f"HTTP {line}")
+        for line in metrics.report():
+            print(f"Phase {line}")
+    
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json, cache={"hits": lookup_cache.hits, "misses": lookup_cache.misses})
+        print(f"Metrics written to {args.metrics_json}")
+    lookup_cache.close()
+
+
+def configure(args: argparse.Namespace, rps: float):
+    """Set up lookups, the HTTP client and generation options from command-line flags."""
+    global lookup_cache, offline_index, rate_limiter, session, page_size, sparql_cache_ttl
+    global fill_isbns, fill_concurrency, min_confidence, merge_existing
+    lookup_cache = open_cache(args.cache_dir, args.no_cache)
+    page_size = args.page_size
+    sparql_cache_ttl = args.sparql_cache_ttl * 60 * 60
+    fill_isbns = not args.no_fill_isbns
+    fill_concurrency = args.concurrency
+    min_confidence = args.min_confidence
+    merge_existing = not args.overwrite
+    rate_limiter = TokenBucket(rate=rps)
+    replay = open_replay(args.record, args.replay, args.replay_latency)
+    session = HTTPClient(rate_limiter=rate_limiter, pool_size=max(args.concurrency, 1), replay=replay)
+    if args.offline_index:
+        offline_index = OfflineIndex(args.offline_index)
+
+
+def _init_worker(args: argparse.Namespace):
+    """Configure a queue worker process; the --rps budget is split between workers."""
+    configure(args, args.rps / args.jobs)
+
+
+def queue_jobs(prize_keys: list, author_names: list, start_year: int, end_year: int) -> list:
+    """(id, payload) queue jobs for prize lists and author bibliographies."""
+    jobs = [
+        (f"prize:{key}:{start_year}-{end_year}",
+         {"kind": "prize", "key": key, "years": [start_year, end_year], "list_id": f"wikidata-{key}"})
+        for key in prize_keys
+    ]
+    jobs += [
+        (f"author:{name}", {"kind": "author", "name": name, "list_id": sanitize_filename(f"author-{name}")})
+        for name in author_names
+    ]
+    return jobs
+
+
+def generate_queued(jobs: list, output_dir: Path) -> dict:
+    """Generate the lists of a batch of claimed queue jobs; returns each job's result.
+
+    Prizes sharing a year range are fetched and gap-filled together, and
+    authors in one query, as in a single-process run. The batch's output,
+    metrics and HTTP stats go with its first completed job; every job
+    carries its list's change record.
+    """
+    global metrics, changes
+    metrics = Metrics()
+    changes = ChangeManifest()
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        prize_jobs = [payload for _, payload in jobs if payload["kind"] == "prize"]
+        for years in sorted({tuple(payload["years"]) for payload in prize_jobs}):
+            keys = [payload["key"] for payload in prize_jobs if tuple(payload["years"]) == years]
+            generate_prize_lists(keys, *years, output_dir, len(keys), fill_concurrency)
+        names = [payload["name"] for _, payload in jobs if payload["kind"] == "author"]
+        if names:
+            generate_author_lists(names, output_dir, len(names), fill_concurrency)
+    
+    results = {}
+    for job_id, payload in jobs:
+        record = changes.lists.get(payload["list_id"])
+        if record and record["status"] == "failed":
+            # Failed, so the queue retries the job instead of marking it done
+            results[job_id] = QueryFailed(record["error"])
+        else:
+            results[job_id] = {"output": "", "changes": {payload["list_id"]: record} if record else {}}
+    done = [job_id for job_id, result in results.items() if isinstance(result, dict)]
+    if done:
+        results[done[0]].update(output=buffer.getvalue(), metrics=metrics.raw(), http=session.raw(reset=True))
+    return results
+
+
+def _queue_worker(queue_path: Path, output_dir: Path, lease: float, batch_size: int) -> int:
+    """Generate queued lists in a worker until the queue is drained; returns how many."""
+    queue = WorkQueue(queue_path, lease)
+    try:
+        return run_worker(queue, lambda jobs: generate_queued(jobs, output_dir), batch=batch_size)
+    finally:
+        queue.close()
+
+
+def run_queue(args: argparse.Namespace, jobs: list):
+    """Queue the jobs, start --jobs local workers and print the results in order."""
+    queue = WorkQueue(args.queue, args.lease)
+    # Jobs left by an interrupted run keep their results
+    queue.retain(job_id for job_id, _ in jobs)
+    added = queue.add(jobs)
+    if added < len(jobs):
+        print(f"Queue: {len(jobs) - added} lists carried over from an interrupted run")
+    
+    pool = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(args,)) if args.jobs > 0 else None
+    failed = 0
+    try:
+        workers = [
+            pool.submit(_queue_worker, args.queue, args.output, args.lease, args.batch_size)
+            for _ in range(args.jobs)
+        ]
+        check = watch_workers(workers)
+        for job_id, payload in jobs:
+            try:
+                result = QueuedJob(queue, job_id, check).result()
+            except JobFailed as e:
+                print(f"⚠ {payload['list_id']} failed: {e}")
+                changes.record(payload["list_id"], args.output / f"{payload['list_id']}.yml", "failed", None, error=str(e))
+                failed += 1
+                continue
+            print(result["output"], end="")
+            metrics.merge(result.get("metrics", {}))
+            session.merge(result.get("http", {}))
+            changes.lists.update(result["changes"])
+    finally:
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        queue.close()
+    
+    if failed:
+        print(f"\n⚠ {failed} lists failed; rerun with the same --queue to retry them")
     else:
-        parser.print_help()
+        args.queue.unlink(missing_ok=True)
 
 
 def generate_prize_list(prize_key: str, start_year: int, end_year: int, output_dir: Path):
@@ -378,40 +1131,96 @@ def generate_prize_list(prize_key: str, start_year: int, end_year: int, output_d
     prize = PRIZES[prize_key]
     
     print(f"Fetching {prize['title']['en']} winners from Wikidata...")
-    books = get_prize_winners(prize["id"], start_year, end_year)
-    
-    if not books:
-        print(f"  No books found for {prize_key}")
-        return
-    
-    books_with_isbn = [b for b in books if b.get("isbn")]
-    print(f"  Found {len(books)} books, {len(books_with_isbn)} with ISBNs")
+    try:
+        books = (book for _, book in iter_prize_winners([prize["id"]], start_year, end_year))
+        if fill_isbns:
+            books = list(books)
+            report_filled(fill_missing_isbns([books], settled=[settled_ids(output_dir / f"wikidata-{prize_key}.yml")]))
+        write_prize_list(prize_key, books, output_dir)
+    except QueryFailed as e:
+        list_failed(f"wikidata-{prize_key}", output_dir, e)
+
+
+def generate_prize_lists(prize_keys: list, start_year: int, end_year: int, output_dir: Path,
+                         batch_size: int = 10, concurrency: int = 2):
+    """Generate lists for several prizes with batched, concurrent queries."""
+    prize_ids = [PRIZES[key]["id"] for key in prize_keys]
+    print(f"Fetching winners of {len(prize_ids)} prizes from Wikidata...")
+    failed = {}
+    results = fetch_in_batches(
+        lambda batch: get_prize_winners_batch(batch, start_year, end_year),
+        prize_ids, batch_size, concurrency, failed
+    )
+    if fill_isbns and results:
+        # One gap-filling pass over every prize, so edition queries are batched across lists
+        keys = [key for key in prize_keys if PRIZES[key]["id"] in results]
+        report_filled(fill_missing_isbns(
+            [results[PRIZES[key]["id"]] for key in keys],
+            settled=[settled_ids(output_dir / f"wikidata-{key}.yml") for key in keys]
+        ))
+    for prize_key in prize_keys:
+        print(f"{PRIZES[prize_key]['title']['en']}:")
+        prize_id = PRIZES[prize_key]["id"]
+        if prize_id in failed:
+            list_failed(f"wikidata-{prize_key}", output_dir, failed[prize_id])
+        else:
+            write_prize_list(prize_key, results[prize_id], output_dir)
+
+
+def write_prize_list(prize_key: str, books: Iterable[dict], output_dir: Path):
+    """Write the YAML list for a prize from its fetched books."""
+    prize = PRIZES[prize_key]
     
-    yaml_content = generate_yaml(
+    output_file = output_dir / f"wikidata-{prize_key}.yml"
+    total, with_isbn, status = write_yaml_list(
+        output_file,
+        books,
+        merge=merge_existing,
         list_id=f"wikidata-{prize_key}",
         title=prize["title"],
         description=prize["description"],
-        books=books,
         tags=["prix", "generated", prize_key]
     )
     
-    output_file = output_dir / f"wikidata-{prize_key}.yml"
-    output_file.write_text(yaml_content, encoding="utf-8")
-    print(f"  Written to {output_file}")
+    if status == "skipped":
+        return
+    if not total:
+        print(f"  No books found for {prize_key}")
+        return
+    
+    print(f"  Found {total} books, {with_isbn} with ISBNs")
+    if status == "unchanged":
+        print(f"  {output_file} is up to date")
+    elif status:
+        print(f"  Written to {output_file}")
 
 
 def generate_author_list(author_name: str, output_dir: Path):
     """Generate a bibliography for an author."""
     
     print(f"Fetching works by {author_name} from Wikidata...")
-    books = get_author_works(author_name)
-    
-    if not books:
-        print(f"  No books found for {author_name}")
-        return
-    
-    books_with_isbn = [b for b in books if b.get("isbn")]
-    print(f"  Found {len(books)} books, {len(books_with_isbn)} with ISBNs")
+    books = (book for _, book in iter_author_works([author_name]))
+    try:
+        write_author_list(author_name, books, output_dir)
+    except QueryFailed as e:
+        list_failed(sanitize_filename(f"author-{author_name}"), output_dir, e)
+
+
+def generate_author_lists(author_names: list, output_dir: Path, batch_size: int = 10, concurrency: int = 2):
+    """Generate bibliographies for several authors with batched, concurrent queries."""
+    print(f"Fetching works by {len(author_names)} authors from Wikidata...")
+    failed = {}
+    results = fetch_in_batches(get_author_works_batch, author_names, batch_size, concurrency, failed)
+    for author_name in author_names:
+        print(f"{author_name}:")
+        if author_name in failed:
+            list_failed(sanitize_filename(f"author-{author_name}"), output_dir, failed[author_name])
+        else:
+            write_author_list(author_name, results[author_name], output_dir)
+
+
+def write_author_list(author_name: str, books: Iterable[dict], output_dir: Path):
+    """Write the YAML bibliography for an author from their fetched works."""
     
     list_id = sanitize_filename(f"author-{author_name}")
     
@@ -429,17 +1238,28 @@ def generate_author_list(author_name: str, output_dir: Path):
         "es": f"Obras de {author_name}."
     }
     
-    yaml_content = generate_yaml(
+    output_file = output_dir / f"{list_id}.yml"
+    total, with_isbn, status = write_yaml_list(
+        output_file,
+        books,
+        merge=merge_existing,
         list_id=list_id,
         title=title,
         description=description,
-        books=books,
         tags=["auteur", "bibliographie", "generated"]
     )
     
-    output_file = output_dir / f"{list_id}.yml"
-    output_file.write_text(yaml_content, encoding="utf-8")
-    print(f"  Written to {output_file}")
+    if status == "skipped":
+        return
+    if not total:
+        print(f"  No books found for {author_name}")
+        return
+    
+    print(f"  Found {total} books, {with_isbn} with ISBNs")
+    if status == "unchanged":
+        print(f"  {output_file} is up to date")
+    elif status:
+        print(f"  Written to {output_file}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,225 @@
+"""
+Shared HTTP client for BiblioGenius curated list tooling.
+
+Wraps a pooled keep-alive session (HTTP/2 through httpx when it is installed
+with h2 support, otherwise a requests Session) with rate limiting, retries
+and per-endpoint latency stats. Transient failures (timeouts, connection
+errors, 429 and 5xx) are retried with exponential backoff and full jitter,
+honouring Retry-After; once retries are exhausted they raise TransientError
+so callers can tell "try again later" apart from a definitive answer such
+as a 404. With a ReplayStore (http_replay.py) definitive responses are
+recorded, or served from the store instead of the network.
+"""
+
+import email.utils
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    import httpx
+except ImportError:
+    httpx = None
+
+from rate_limit import TokenBucket
+
+USER_AGENT = "BiblioGenius List Tools/1.0 (https://github.com/umutKaracelebi/bibliogenius-app)"
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class TransientError(Exception):
+    """A request that kept failing for reasons that may go away (throttling, outages)."""
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class EndpointStats:
+    """Request counts and latencies for one host/path."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.latencies = []
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class HTTPClient:
+    """Pooled HTTP client with rate limiting, retries and latency stats."""
+
+    def __init__(
+        self,
+        rate_limiter: TokenBucket = None,
+        pool_size: int = 10,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 60.0,
+        headers: dict = None,
+        replay=None,
+    ):
+        self.rate_limiter = rate_limiter
+        self.replay = replay
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.stats = {}
+        self._lock = threading.Lock()
+
+        headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        if httpx is not None:
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            self._session = httpx.Client(http2=True, limits=limits, headers=headers, follow_redirects=True)
+            self._errors = (httpx.TransportError,)
+        else:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+            self._session.headers.update(headers)
+            self._errors = (requests.ConnectionError, requests.Timeout)
+
+    def _endpoint(self, url: str) -> EndpointStats:
+        parts = urlsplit(url)
+        # Collapse per-ISBN paths such as /isbn/978....json into one endpoint
+        path = parts.path.rsplit("/", 1)[0] + "/*" if parts.path.startswith("/isbn/") else parts.path
+        key = f"{parts.netloc}{path}"
+        with self._lock:
+            return self.stats.setdefault(key, EndpointStats())
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(self.backoff_cap, retry_after)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def request(self, method: str, url: str, timeout: float = 10, **kwargs):
+        """Send a request, retrying transient failures; returns the final response.
+
+        Definitive responses (2xx, 3xx, and 4xx other than 408/429) are
+        returned as-is for the caller to inspect. Raises TransientError when
+        retries are exhausted.
+        """
+        stats = self._endpoint(url)
+        if self.replay and self.replay.replaying:
+            return self._replayed(stats, method, url, kwargs)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            started = time.monotonic()
+            retry_after = None
+            try:
+                response = self._session.request(method, url, timeout=timeout, **kwargs)
+            except self._errors as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    with self._lock:
+                        stats.requests += 1
+                        stats.latencies.append(time.monotonic() - started)
+                    if self.replay:
+                        self.replay.save(method, url, kwargs, response)
+                    return response
+                last_error = f"HTTP {response.status_code}"
+                retry_after = _retry_after(response.headers.get("Retry-After"))
+
+            with self._lock:
+                stats.requests += 1
+                stats.latencies.append(time.monotonic() - started)
+                if attempt < self.max_retries:
+                    stats.retries += 1
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        with self._lock:
+            stats.failures += 1
+        raise TransientError(f"{method} {url} failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def _replayed(self, stats: EndpointStats, method: str, url: str, kwargs: dict):
+        # Recorded answers skip the rate limiter and retries; misses count as failures
+        started = time.monotonic()
+        try:
+            return self.replay.replay(method, url, kwargs)
+        except TransientError:
+            with self._lock:
+                stats.failures += 1
+            raise
+        finally:
+            with self._lock:
+                stats.requests += 1
+                stats.latencies.append(time.monotonic() - started)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs):
+        if httpx is None:
+            # httpx follows redirects client-wide; requests needs it per HEAD call
+            kwargs.setdefault("allow_redirects", True)
+        return self.request("HEAD", url, **kwargs)
+
+    def raw(self, reset: bool = False) -> dict:
+        """Endpoint stats as plain data for merge() in another process; `reset` starts them over."""
+        with self._lock:
+            raw = {
+                "endpoints": {
+                    endpoint: {"requests": s.requests, "retries": s.retries, "failures": s.failures, "latencies": list(s.latencies)}
+                    for endpoint, s in self.stats.items()
+                },
+            }
+            if reset:
+                self.stats = {}
+        if self.replay:
+            raw["replay"] = self.replay.counts(reset)
+        return raw
+
+    def merge(self, raw: dict):
+        """Add stats from raw() of another client, e.g. a worker process's."""
+        with self._lock:
+            for endpoint, values in raw.get("endpoints", {}).items():
+                s = self.stats.setdefault(endpoint, EndpointStats())
+                s.requests += values["requests"]
+                s.retries += values["retries"]
+                s.failures += values["failures"]
+                s.latencies.extend(values["latencies"])
+        if self.replay and raw.get("replay"):
+            self.replay.merge(raw["replay"])
+
+    def report(self) -> list:
+        """One summary line per endpoint."""
+        lines = []
+        with self._lock:
+            for endpoint, s in sorted(self.stats.items()):
+                lines.append(
+                    f"{endpoint}: {s.requests} requests, {s.retries} retries, {s.failures} failures, "
+                    f"p50 {s.percentile(0.5) * 1000:.0f}ms, p95 {s.percentile(0.95) * 1000:.0f}ms"
+                )
+        if self.replay:
+            lines.append(self.replay.report())
+        return lines
+
+    def close(self):
+        self._session.close()
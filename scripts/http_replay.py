@@ -0,0 +1,170 @@
+"""
+Record/replay store for HTTPClient traffic.
+
+In record mode every definitive response (anything HTTPClient would return
+rather than retry) is saved; in replay mode requests are answered from the
+store without touching the network, after an optional artificial latency,
+so full-corpus runs are deterministic and can run on machines without
+network access.
+
+The store is content-addressed: each request is keyed by the SHA-256 of its
+canonical form (method, URL with sorted query parameters, body), and
+response bodies are zlib-compressed blobs named by the SHA-256 of their
+content, so identical answers (e.g. the many empty search results) are
+stored once:
+
+    <store>/requests/ab/ab12....json   status, content type, body digest
+    <store>/blobs/cd/cd34....zz        compressed response body
+
+Files are written atomically, so several threads or --jobs processes can
+record into one store. Record and replay with the same lookup cache state
+(--no-cache is simplest): answers served from the cache are never recorded.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from atomic_file import atomic_write_bytes
+from http_client import TransientError
+
+MODES = ("record", "replay")
+
+
+class ReplayMiss(TransientError):
+    """A request that was never recorded, raised in replay mode."""
+
+
+class ReplayResponse:
+    """The parts of a response the tools read, rebuilt from the store."""
+
+    def __init__(self, status_code: int, headers: dict, content: bytes):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def request_key(method: str, url: str, params: dict = None, data=None, json_body=None) -> str:
+    """SHA-256 of a request's canonical form; equal requests share a key."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        query.extend((name, str(v)) for v in values)
+    canonical_url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(sorted(query)), ""))
+    if json_body is not None:
+        body = json.dumps(json_body, sort_keys=True, separators=(",", ":"))
+    elif isinstance(data, dict):
+        body = urlencode(sorted(data.items()))
+    elif isinstance(data, bytes):
+        body = data.decode("utf-8", errors="replace")
+    else:
+        body = data or ""
+    return hashlib.sha256(f"{method.upper()} {canonical_url}\n{body}".encode("utf-8")).hexdigest()
+
+
+class ReplayStore:
+    """Directory of recorded responses, used by HTTPClient in record or replay mode."""
+
+    def __init__(self, directory: Path, mode: str, latency: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.latency = latency
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        self._lock = threading.Lock()
+        if mode == "replay" and not (self.directory / "requests").is_dir():
+            raise FileNotFoundError(f"No recordings in {self.directory}")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _path(self, kind: str, digest: str, suffix: str) -> Path:
+        return self.directory / kind / digest[:2] / f"{digest}{suffix}"
+
+    def _write(self, path: Path, payload: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(path, payload)
+
+    def save(self, method: str, url: str, kwargs: dict, response):
+        """Record a definitive response to a request."""
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        blob = self._path("blobs", digest, ".zz")
+        if not blob.exists():
+            self._write(blob, zlib.compress(content, 9))
+        headers = {name: response.headers[name] for name in ("Content-Type", "Retry-After") if name in response.headers}
+        record = {"status": response.status_code, "headers": headers, "body": digest}
+        key = request_key(method, url, kwargs.get("params"), kwargs.get("data"), kwargs.get("json"))
+        self._write(self._path("requests", key, ".json"), json.dumps(record, sort_keys=True).encode("utf-8"))
+        with self._lock:
+            self.recorded += 1
+
+    def load(self, method: str, url: str, kwargs: dict) -> Optional[ReplayResponse]:
+        """Recorded response to a request, or None if it was never recorded."""
+        key = request_key(method, url, kwargs.get("params"), kwargs.get("data"), kwargs.get("json"))
+        try:
+            record = json.loads(self._path("requests", key, ".json").read_bytes())
+            content = zlib.decompress(self._path("blobs", record["body"], ".zz").read_bytes())
+        except FileNotFoundError:
+            with self._lock:
+                self.missed += 1
+            return None
+        with self._lock:
+            self.replayed += 1
+        return ReplayResponse(record["status"], record["headers"], content)
+
+    def replay(self, method: str, url: str, kwargs: dict) -> ReplayResponse:
+        """Serve a recorded response after the artificial latency; raises ReplayMiss if absent."""
+        if self.latency:
+            time.sleep(self.latency)
+        response = self.load(method, url, kwargs)
+        if response is None:
+            raise ReplayMiss(f"{method} {url} was not recorded in {self.directory}")
+        return response
+
+    def counts(self, reset: bool = False) -> dict:
+        """Recorded, replayed and missed counts, for merge() in another process."""
+        with self._lock:
+            counts = {"recorded": self.recorded, "replayed": self.replayed, "missed": self.missed}
+            if reset:
+                self.recorded = self.replayed = self.missed = 0
+        return counts
+
+    def merge(self, counts: dict):
+        with self._lock:
+            self.recorded += counts.get("recorded", 0)
+            self.replayed += counts.get("replayed", 0)
+            self.missed += counts.get("missed", 0)
+
+    def report(self) -> str:
+        if self.replaying:
+            return f"replay {self.directory}: {self.replayed} served, {self.missed} not recorded"
+        return f"record {self.directory}: {self.recorded} responses saved"
+
+
+def open_replay(record: Optional[Path], replay: Optional[Path], latency: float = 0.0) -> Optional[ReplayStore]:
+    """Build the store selected by the --record / --replay flags."""
+    if record:
+        return ReplayStore(record, "record")
+    if replay:
+        return ReplayStore(replay, "replay", latency)
+    return None
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Compact, memory-mapped set of known ISBN-13s.
+
+The build step packs every known ISBN-13 as a sorted 64-bit integer into a
+binary file. Lookups memory-map the file and binary-search it in place, so
+opening is instant and membership checks touch only a few pages, with no
+parsing or copying.
+
+Usage:
+    python isbn_set.py build --output isbns.bin isbns.txt.gz --column 0
+    python isbn_set.py build --output isbns.bin --from-offline-index offline.sqlite3
+    python isbn_set.py check --set isbns.bin 9782070360024
+"""
+
+import argparse
+import heapq
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from atomic_file import AtomicFile
+from isbn_utils import iter_chunks, normalize_isbn, open_input, validate_batch
+
+MAGIC = b"BGISBN\x01"
+HEADER = struct.Struct("<7sc Q")  # magic, byte order, count (16 bytes, keeps data 8-aligned)
+
+
+class ISBNSet:
+    """Read-only membership checks over a file written by build_isbn_set()."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, order, count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an ISBN set file")
+        if order.decode() != sys.byteorder[0]:
+            raise ValueError(f"{self.path} was built on a machine with a different byte order")
+        self._values = memoryview(self._mmap)[HEADER.size:HEADER.size + count * 8].cast("Q")
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, isbn13) -> bool:
+        try:
+            value = int(isbn13)
+        except ValueError:
+            return False
+        i = bisect_left(self._values, value)
+        return i < len(self._values) and self._values[i] == value
+
+    def close(self):
+        self._values.release()
+        self._mmap.close()
+
+
+def iter_isbn13s(lines: Iterable[str], column: int = None, delimiter: str = "\t") -> Iterator[int]:
+    """Normalize raw ISBN text (any form) into ISBN-13 integers, skipping invalid rows."""
+    def values():
+        for line in lines:
+            line = line.rstrip("\n")
+            if column is None:
+                yield line
+            else:
+                parts = line.split(delimiter)
+                yield parts[column] if column < len(parts) else ""
+
+    for chunk in iter_chunks(values(), 100_000):
+        mask, normalized = validate_batch(chunk)
+        for ok, isbn13 in zip(mask, normalized):
+            if ok:
+                yield int(isbn13)
+
+
+def _write_run(values: array, directory: str) -> str:
+    """Sort a chunk of values and spill it to a temporary run file."""
+    values = array("Q", sorted(values))
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        values.tofile(f)
+    return path
+
+
+def _read_run(path: str, block: int = 1 << 16) -> Iterator[int]:
+    """Stream integers back out of a run file."""
+    with open(path, "rb") as f:
+        while True:
+            values = array("Q")
+            values.frombytes(f.read(block * 8))
+            if not values:
+                return
+            yield from values
+
+
+def build_isbn_set(isbns: Iterable[int], output: Path, run_size: int = 5_000_000) -> int:
+    """Write a sorted, deduplicated ISBN set file; memory is bounded by run_size."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output.parent) as workdir:
+        runs = []
+        buffer = array("Q")
+        for value in isbns:
+            buffer.append(value)
+            if len(buffer) >= run_size:
+                runs.append(_write_run(buffer, workdir))
+                buffer = array("Q")
+        if buffer:
+            runs.append(_write_run(buffer, workdir))
+
+        count = 0
+        with AtomicFile(output, binary=True) as f:
+            f.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), 0))
+            previous = None
+            out = array("Q")
+            for value in heapq.merge(*(_read_run(run) for run in runs)):
+                if value == previous:
+                    continue
+                previous = value
+                out.append(value)
+                if len(out) >= 1 << 16:
+                    out.tofile(f)
+                    count += len(out)
+                    out = array("Q")
+            out.tofile(f)
+            count += len(out)
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), count))
+            f.commit()
+    return count
+
+
+def isbns_from_offline_index(path: Path) -> Iterator[int]:
+    """ISBN-13s of every edition in an offline_index.py database."""
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for (isbn13,) in db.execute("SELECT isbn13 FROM editions"):
+            yield int(isbn13)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a memory-mapped ISBN set")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Pack ISBNs into a sorted binary set")
+    build.add_argument("inputs", nargs="*", help="Text files (optionally .gz) with ISBNs, or - for stdin")
+    build.add_argument("--output", type=Path, required=True, help="Set file to write")
+    build.add_argument("--column", type=int, default=None, help="0-based column holding the ISBN (default: whole line)")
+    build.add_argument("--delimiter", default="\t", help="Column delimiter (default: tab)")
+    build.add_argument("--from-offline-index", type=Path, default=None, help="Also take every edition from an offline index")
+
+    check = sub.add_parser("check", help="Check ISBNs against a set")
+    check.add_argument("--set", type=Path, required=True, help="Set file")
+    check.add_argument("isbns", nargs="+", help="ISBNs to check")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        def sources():
+            for path in args.inputs:
+                with open_input(path) as f:
+                    yield from iter_isbn13s(f, args.column, args.delimiter)
+            if args.from_offline_index:
+                yield from isbns_from_offline_index(args.from_offline_index)
+
+        count = build_isbn_set(sources(), args.output)
+        print(f"Wrote {count} ISBNs to {args.output}")
+        return
+
+    isbn_set = ISBNSet(args.set)
+    for isbn in args.isbns:
+        isbn13 = normalize_isbn(isbn)
+        print(f"{isbn}: {'known' if isbn13 and isbn13 in isbn_set else 'unknown'}")
+    isbn_set.close()
+
+
+if __name__ == "__main__":
+    main()
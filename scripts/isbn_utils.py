@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+ISBN checksum and normalization helpers for BiblioGenius curated lists.
+
+Scalar functions back validate_isbns.py; the batch API validates and
+normalizes large arrays of ISBNs (e.g. Open Library dump columns) with
+NumPy when it is installed, and falls back to the scalar path otherwise.
+
+Run with: python isbn_utils.py editions.txt.gz --column 2 --valid-only
+"""
+
+import argparse
+import gzip
+import sys
+from itertools import islice
+from typing import Iterable, Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_STRIP = str.maketrans("", "", "- ")
+
+_ISBN13_WEIGHTS = (1, 3) * 6 + (1,)
+_ISBN10_WEIGHTS = tuple(range(10, 0, -1))
+
+
+def validate_isbn(isbn: str) -> bool:
+    """Validate ISBN-10 or ISBN-13 checksum."""
+    isbn = isbn.replace("-", "").replace(" ", "")
+
+    if len(isbn) == 10:
+        # ISBN-10 validation
+        if not isbn[:-1].isdigit() or (isbn[-1] not in "0123456789Xx"):
+            return False
+        total = sum((10 - i) * (int(c) if c.isdigit() else 10) for i, c in enumerate(isbn))
+        return total % 11 == 0
+    elif len(isbn) == 13:
+        # ISBN-13 validation
+        if not isbn.isdigit():
+            return False
+        total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(isbn))
+        return total % 10 == 0
+    return False
+
+
+def isbn13_check_digit(first12: str) -> str:
+    """Compute the ISBN-13 check digit for 12 leading digits."""
+    total = sum(int(c) * w for c, w in zip(first12, _ISBN13_WEIGHTS))
+    return str((10 - total % 10) % 10)
+
+
+def isbn10_to_13(isbn10: str) -> str:
+    """Convert an ISBN-10 to its 978-prefixed ISBN-13."""
+    core = "978" + isbn10.translate(_STRIP)[:9]
+    return core + isbn13_check_digit(core)
+
+
+def normalize_isbn(isbn: str) -> str:
+    """Return the ISBN-13 form of a valid ISBN, or "" if it is invalid."""
+    try:
+        if not validate_isbn(isbn):
+            return ""
+    except ValueError:
+        # Non-ASCII digits such as superscripts pass isdigit() but not int()
+        return ""
+    isbn = "".join(str(int(c)) if c.isdigit() else c for c in isbn.translate(_STRIP))
+    return isbn10_to_13(isbn) if len(isbn) == 10 else isbn
+
+
+def _strip(isbn: str) -> str:
+    """Remove hyphens and spaces, skipping the copy when there are none."""
+    if "-" in isbn or " " in isbn:
+        return isbn.replace("-", "").replace(" ", "")
+    return isbn
+
+
+def validate_batch(isbns: list) -> tuple:
+    """Validate and normalize many ISBNs at once.
+
+    Returns (mask, normalized): mask[i] is validate_isbn(isbns[i]) and
+    normalized[i] is the ISBN-13 form of valid entries (empty otherwise).
+    With NumPy these are a bool array and an ASCII bytes ("S13") array;
+    without it, a list of bools and a list of str.
+    """
+    if np is None:
+        normalized = [normalize_isbn(isbn) for isbn in isbns]
+        return [bool(n) for n in normalized], normalized
+
+    n = len(isbns)
+    cleaned = [_strip(isbn) for isbn in isbns]
+    fallback = []
+    try:
+        packed = np.array(cleaned, dtype="S")
+    except UnicodeEncodeError:
+        # Rare non-ASCII rows (e.g. Arabic-Indic digits) go through the scalar path
+        fallback = [i for i, isbn in enumerate(cleaned) if not isbn.isascii()]
+        for i in fallback:
+            cleaned[i] = ""
+        packed = np.array(cleaned, dtype="S")
+
+    mask = np.zeros(n, dtype=bool)
+    normalized = np.zeros(n, dtype="S13")
+    lengths = np.char.str_len(packed)
+    width = packed.dtype.itemsize
+    chars = packed.view(np.uint8).reshape(n, width) if n else np.zeros((0, width), dtype=np.uint8)
+
+    if width >= 13:
+        idx = np.flatnonzero(lengths == 13)
+        digits = chars[idx, :13].astype(np.int16) - 48
+        ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        ok &= (digits * np.array(_ISBN13_WEIGHTS)).sum(axis=1) % 10 == 0
+        mask[idx] = ok
+        normalized[idx[ok]] = _digit_strings(digits[ok], 13)
+
+    if width >= 10:
+        idx = np.flatnonzero(lengths == 10)
+        digits = chars[idx, :10].astype(np.int16) - 48
+        is_digit = (digits >= 0) & (digits <= 9)
+        # 'X' and 'x' are worth 10 in the check position only
+        is_x = (digits[:, 9] == ord("X") - 48) | (digits[:, 9] == ord("x") - 48)
+        digits[is_x, 9] = 10
+        ok = is_digit[:, :9].all(axis=1) & (is_digit[:, 9] | is_x)
+        ok &= (digits * np.array(_ISBN10_WEIGHTS)).sum(axis=1) % 11 == 0
+        mask[idx] = ok
+
+        body = np.hstack([np.broadcast_to(np.array([9, 7, 8], dtype=np.int16), (len(idx), 3)), digits[:, :9]])
+        check = (10 - (body * np.array(_ISBN13_WEIGHTS[:12])).sum(axis=1) % 10) % 10
+        normalized[idx[ok]] = _digit_strings(np.hstack([body, check[:, None]])[ok], 13)
+
+    for i in fallback:
+        isbn13 = normalize_isbn(isbns[i])
+        normalized[i] = isbn13.encode("ascii")
+        mask[i] = bool(isbn13)
+
+    return mask, normalized
+
+
+def _digit_strings(digits, width: int):
+    """Turn an (n, width) array of digit values into ASCII byte strings."""
+    packed = (digits + 48).astype(np.uint8).tobytes()
+    return np.frombuffer(packed, dtype=f"S{width}")
+
+
+def iter_chunks(values: Iterable[str], size: int) -> Iterator[list]:
+    """Yield lists of up to `size` items from an iterable."""
+    iterator = iter(values)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def open_input(path: str):
+    """Open a plain or gzip text file, or stdin for '-'."""
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and normalize ISBNs from a large file")
+    parser.add_argument("input", help="Text file (optionally .gz) with one record per line, or - for stdin")
+    parser.add_argument("--column", type=int, default=None, help="0-based column holding the ISBN (default: whole line)")
+    parser.add_argument("--delimiter", default="\t", help="Column delimiter (default: tab)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows validated per batch")
+    parser.add_argument("--valid-only", action="store_true", help="Only print the ISBN-13 of valid rows")
+    args = parser.parse_args()
+
+    def values(lines):
+        for line in lines:
+            line = line.rstrip("\n")
+            if args.column is None:
+                yield line
+            else:
+                parts = line.split(args.delimiter)
+                yield parts[args.column] if args.column < len(parts) else ""
+
+    total = valid = 0
+    out = sys.stdout
+    with open_input(args.input) as f:
+        for chunk in iter_chunks(values(f), args.chunk_size):
+            mask, normalized = validate_batch(chunk)
+            total += len(chunk)
+            for raw, ok, isbn13 in zip(chunk, mask, normalized):
+                if isinstance(isbn13, bytes):
+                    isbn13 = isbn13.decode("ascii")
+                if ok:
+                    valid += 1
+                    out.write(f"{isbn13}\n" if args.valid_only else f"{raw}\t1\t{isbn13}\n")
+                elif not args.valid_only:
+                    out.write(f"{raw}\t0\t\n")
+
+    print(f"Checked {total} ISBNs, {valid} valid", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
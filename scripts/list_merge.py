@@ -0,0 +1,193 @@
+"""
+Merge regenerated curated lists into their existing files.
+
+Generated entries carry the Wikidata id of their work, so a regenerated
+list can be matched against the file already on disk: entries are matched
+by wikidata_id, or by ISBN for entries written before ids were recorded.
+Whatever is in the file wins - an ISBN corrected by validate_isbns.py --fix,
+a reworded note, extra fields such as alt_editions, hand-added entries and
+edited list titles are all kept. Only works not in the file yet are added,
+and a note and wikidata_id are filled in on entries that lack them. Nothing
+is removed, so a run over a narrower --years range does not drop older
+winners. Comments other than the generator's own are not preserved.
+
+A list records the Wikidata ids of every entry it was written with under
+`wikidata_ids`. A work whose id is recorded there but whose entry is no
+longer in `books` was removed by hand, and is not added back.
+
+The content hash of a list ignores the "# Generated:" timestamp line, so a
+regeneration that changes nothing leaves the file (and its mtime) alone.
+ChangeManifest records which lists and ISBNs were added or updated so that
+later steps (validate_isbns.py --changes) only process the delta, and which
+lists were left untouched because a query failed.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from atomic_file import AtomicFile
+from curated_bundle import load_yaml
+from isbn_utils import normalize_isbn
+
+MANIFEST_VERSION = 1
+
+# Book fields written by the generator; anything else in an entry is manual
+GENERATED_KEYS = ("isbn", "note", "wikidata_id")
+
+# List fields written by the generator, in file order
+LIST_KEYS = ("id", "version", "title", "description", "contributor", "tags", "books", "wikidata_ids")
+
+TIMESTAMP_PREFIX = "# Generated:"
+
+
+def content_digest(lines: Iterable[str]) -> str:
+    """SHA-256 of a list's lines, ignoring the generation timestamp."""
+    digest = hashlib.sha256()
+    for line in lines:
+        if not line.startswith(TIMESTAMP_PREFIX):
+            digest.update(line.rstrip("\n").encode("utf-8"))
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def file_content_digest(path: Path) -> Optional[str]:
+    """content_digest() of a file on disk, or None if it does not exist."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return content_digest(f)
+    except FileNotFoundError:
+        return None
+
+
+def read_list(path: Path) -> Optional[dict]:
+    """Parsed list file, or None if there is none yet. Raises yaml.YAMLError."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return load_yaml(f) or {}
+    except FileNotFoundError:
+        return None
+
+
+def entry_isbn(entry) -> str:
+    """ISBN of an entry in either list format (plain string or mapping)."""
+    isbn = entry.get("isbn", "") if isinstance(entry, dict) else entry
+    return str(isbn or "")
+
+
+def _isbn_key(isbn: str) -> str:
+    return normalize_isbn(isbn) or isbn.replace("-", "").replace(" ", "").upper()
+
+
+def generated_ids(existing: dict) -> set:
+    """Wikidata ids a list file records as written by the generator."""
+    return {str(qid) for qid in existing.get("wikidata_ids") or []}
+
+
+def merge_entries(existing: list, fresh: Iterable[dict], changes: dict, generated: set = frozenset()) -> Iterator:
+    """Merge freshly generated entries into a list's existing entries.
+
+    Matched entries keep their existing content, gaining generated fields
+    they lack; unmatched fresh entries are added, unless their wikidata_id
+    is in `generated` (their entry was deleted from the file). The result follows the
+    generator's order, with entries the generator did not return kept after
+    the entry they followed in the file. Added and updated ISBNs are
+    appended to changes["added"] / changes["updated"].
+    """
+    by_id = {}
+    by_isbn = {}
+    for i, entry in enumerate(existing):
+        if isinstance(entry, dict) and entry.get("wikidata_id"):
+            by_id.setdefault(entry["wikidata_id"], i)
+        elif entry_isbn(entry):
+            by_isbn.setdefault(_isbn_key(entry_isbn(entry)), i)
+
+    merged = []
+    position = {}
+    for entry in fresh:
+        i = by_id.get(entry.get("wikidata_id"))
+        if i is None and entry.get("isbn"):
+            i = by_isbn.get(_isbn_key(entry["isbn"]))
+        if i is None:
+            if entry.get("wikidata_id") in generated:
+                continue
+            merged.append(entry)
+            if entry.get("isbn"):
+                changes["added"].append(entry["isbn"])
+            continue
+        if i in position:
+            continue
+        current = existing[i] if isinstance(existing[i], dict) else {"isbn": existing[i]}
+        update = {key: entry[key] for key in GENERATED_KEYS if key in entry and key not in current}
+        if update:
+            current = {**current, **update}
+            changes["updated"].append(entry_isbn(current))
+        else:
+            current = existing[i]
+        position[i] = len(merged)
+        merged.append(current)
+
+    # Entries the generator did not return stay next to the entry they followed
+    after = {}
+    anchor = None
+    for i, entry in enumerate(existing):
+        if i in position:
+            anchor = position[i]
+        else:
+            after.setdefault(anchor, []).append(entry)
+
+    yield from after.get(None, [])
+    for k, entry in enumerate(merged):
+        yield entry
+        yield from after.get(k, [])
+
+
+def merge_list_fields(existing: dict, list_fields: dict) -> tuple:
+    """Generated list fields overridden by the existing file's, plus its extra fields."""
+    fields = dict(list_fields)
+    for key in ("title", "description", "contributor", "tags"):
+        if existing.get(key):
+            fields[key] = existing[key]
+    extra = {key: value for key, value in existing.items() if key not in LIST_KEYS}
+    return fields, extra, existing.get("version") or 1
+
+
+class ChangeManifest:
+    """Per-list record of what a generation run changed, written as JSON."""
+
+    def __init__(self):
+        self.lists = {}
+
+    def record(self, list_id: str, path: Path, status: str, digest: Optional[str], added: list = (), updated: list = (),
+               error: str = None):
+        self.lists[list_id] = {
+            "file": str(Path(path).resolve()),
+            "status": status,
+            "sha256": digest,
+            "added": list(added),
+            "updated": list(updated),
+        }
+        if error:
+            self.lists[list_id]["error"] = error
+
+    def counts(self) -> dict:
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        for record in self.lists.values():
+            counts[record["status"]] += 1
+        return counts
+
+    def write(self, path: Path):
+        """Write the manifest atomically."""
+        manifest = {"version": MANIFEST_VERSION, "generated": datetime.now().isoformat(), "lists": self.lists}
+        with AtomicFile(path) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.commit()
+
+
+def changed_files(manifest_path: Path) -> list:
+    """Files of the lists a change manifest marks as created or updated."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return sorted(Path(record["file"]) for record in manifest.get("lists", {}).values() if record["status"] in ("created", "updated"))
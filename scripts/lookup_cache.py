@@ -0,0 +1,131 @@
+"""
+Persistent lookup cache for BiblioGenius curated list tooling.
+
+Stores Open Library and Wikidata answers in a small SQLite database so that
+repeated runs (CI, nightly, manual --fix passes) do not ask the same
+questions again. Entries live in namespaces ("search", "isbn", "sparql", ...)
+and expire after a TTL; negative answers (None) use a shorter TTL so books
+that appear later in the catalogue are picked up.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "bibliogenius-lists"
+
+DAY = 24 * 60 * 60
+
+
+def normalize_key(text: str) -> str:
+    """Normalize a free-text query so equivalent lookups share an entry."""
+    return " ".join(text.lower().split())
+
+
+class LookupCache:
+    """SQLite-backed key/value cache with TTLs and LRU size bound.
+
+    Pass `directory=None` for a process-local in-memory cache (--no-cache).
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = DEFAULT_CACHE_DIR,
+        ttl: float = 30 * DAY,
+        negative_ttl: float = 1 * DAY,
+        max_entries: int = 200_000,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        if directory is None:
+            target = ":memory:"
+        else:
+            directory = Path(directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            target = str(directory / "lookups.sqlite3")
+
+        self._db = sqlite3.connect(target, check_same_thread=False, isolation_level=None)
+        if directory is not None:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def get(self, namespace: str, key: str) -> tuple[bool, Any]:
+        """Return (hit, value). A hit may carry a cached None (negative result)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return False, None
+            self._db.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value; None and False are treated as negative results.
+
+        `ttl` overrides the cache's TTLs for this entry.
+        """
+        now = time.time()
+        if ttl is None:
+            ttl = self.ttl if value else self.negative_ttl
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones over the bound."""
+        self._db.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def close(self):
+        """Apply the size bound and close the database."""
+        with self._lock:
+            self._evict(time.time())
+            self._db.close()
+
+
+def open_cache(cache_dir: Optional[Path], no_cache: bool = False) -> LookupCache:
+    """Build the cache selected by the --cache-dir / --no-cache flags."""
+    if no_cache:
+        return LookupCache(directory=None)
+    return LookupCache(directory=cache_dir or DEFAULT_CACHE_DIR)
@@ -0,0 +1,141 @@
+"""
+Title/author matching for BiblioGenius curated list tooling.
+
+Scores candidate books (Open Library search docs, offline index rows) against
+a list entry's note by trigram similarity of normalized titles and authors.
+Notes come as "Title - Author" or "Author - Title", so both orientations are
+tried. Candidates are indexed by title trigram, so only those sharing enough
+trigrams with the query are scored in full, even over thousands of candidates.
+"""
+
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from isbn_utils import normalize_isbn
+from offline_index import text_key
+
+# ISBN-13 registration group prefixes -> Open Library (MARC) language codes
+ISBN_GROUP_LANGUAGES = (
+    ("97910", "fre"), ("97911", "kor"), ("97912", "ita"),
+    ("97884", "spa"), ("97888", "ita"),
+    ("9782", "fre"), ("9783", "ger"), ("9784", "jpn"),
+    ("9780", "eng"), ("9781", "eng"),
+)
+
+TITLE_WEIGHT = 0.6
+AUTHOR_WEIGHT = 0.4
+LANGUAGE_BONUS = 0.05
+
+
+class Candidate(NamedTuple):
+    title: str
+    authors: tuple
+    isbns: tuple
+    languages: tuple = ()
+
+
+class Match(NamedTuple):
+    isbn: Optional[str]
+    confidence: float
+    candidate: Optional[Candidate] = None
+
+
+def trigrams(text: str) -> frozenset:
+    """Character trigrams of a normalized string, padded at word edges."""
+    key = f"  {text_key(text)} "
+    return frozenset(key[i:i + 3] for i in range(len(key) - 2))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Dice coefficient of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def isbn_language(isbn: str) -> Optional[str]:
+    """Language implied by an ISBN's registration group, if it is a common one."""
+    isbn13 = normalize_isbn(isbn)
+    for prefix, language in ISBN_GROUP_LANGUAGES:
+        if isbn13.startswith(prefix):
+            return language
+    return None
+
+
+def infer_language(isbns: list) -> Optional[str]:
+    """Most common edition language among a list's valid ISBNs."""
+    counts = Counter(filter(None, (isbn_language(isbn) for isbn in isbns)))
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def pick_isbn(candidate: Candidate, language: str = None) -> Optional[str]:
+    """Choose one ISBN-13 of a candidate, preferring the list's language."""
+    normalized = [n for n in (normalize_isbn(isbn) for isbn in candidate.isbns) if n]
+    if not normalized:
+        return None
+    if language:
+        for isbn in normalized:
+            if isbn_language(isbn) == language:
+                return isbn
+    return next((isbn for isbn in normalized if isbn.startswith("978")), normalized[0])
+
+
+class MatchIndex:
+    """Precomputed trigram index over a set of candidates."""
+
+    def __init__(self, candidates: list):
+        self.candidates = list(candidates)
+        self._titles = [trigrams(c.title) for c in self.candidates]
+        self._authors = [[trigrams(a) for a in c.authors] for c in self.candidates]
+        self._postings = {}
+        for i, grams in enumerate(self._titles):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+    def _shortlist(self, grams: frozenset, size: int) -> list:
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        return [i for i, _ in shared.most_common(size)]
+
+    def _score(self, i: int, title: frozenset, author: Optional[frozenset]) -> float:
+        title_score = similarity(self._titles[i], title)
+        if author is None:
+            return title_score
+        author_score = max((similarity(a, author) for a in self._authors[i]), default=0.0)
+        return TITLE_WEIGHT * title_score + AUTHOR_WEIGHT * author_score
+
+    def best_match(self, first: str, second: str = None, language: str = None, shortlist: int = 50) -> Match:
+        """Best candidate for a note split into two parts, in either orientation."""
+        orientations = [(first, second)]
+        if second:
+            orientations.append((second, first))
+
+        best, best_rank, best_score = None, -1.0, 0.0
+        for title, author in orientations:
+            title_grams = trigrams(title)
+            author_grams = trigrams(author) if author else None
+            for i in self._shortlist(title_grams, shortlist):
+                score = self._score(i, title_grams, author_grams)
+                rank = score + (LANGUAGE_BONUS if language and language in self.candidates[i].languages else 0)
+                if rank > best_rank:
+                    best, best_rank, best_score = i, rank, score
+
+        if best is None:
+            return Match(None, 0.0)
+        candidate = self.candidates[best]
+        return Match(pick_isbn(candidate, language), round(best_score, 3), candidate)
+
+
+def candidates_from_docs(docs: list) -> list:
+    """Candidates from Open Library search.json docs."""
+    return [
+        Candidate(
+            title=doc.get("title", ""),
+            authors=tuple(doc.get("author_name", [])),
+            isbns=tuple(doc.get("isbn", [])),
+            languages=tuple(doc.get("language", [])),
+        )
+        for doc in docs
+        if doc.get("isbn")
+    ]
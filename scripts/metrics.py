@@ -0,0 +1,174 @@
+"""
+Run metrics for BiblioGenius curated list tooling.
+
+Counters and per-phase latency histograms shared by the validation and
+generation scripts. A run can dump a JSON snapshot (--metrics-json) and
+print a periodic progress line with throughput, cache hit rate and an ETA
+(--progress). Metrics gathered in worker processes are shipped back as
+raw() dicts and folded in with merge().
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class Histogram:
+    """Latency samples of one phase."""
+
+    def __init__(self, samples: list = None):
+        self.samples = list(samples or [])
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def summary(self) -> dict:
+        total = sum(self.samples)
+        count = len(self.samples)
+        return {
+            "count": count,
+            "total_s": round(total, 6),
+            "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "max_ms": round(max(self.samples, default=0.0) * 1000, 3),
+        }
+
+
+class Metrics:
+    """Thread-safe counters and phase histograms for one run."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counters = {}
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases.setdefault(phase, Histogram()).samples.append(seconds)
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Record the duration of the enclosed block under `phase`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def raw(self) -> dict:
+        """Counters and samples in a picklable form for merge()."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "phases": {phase: list(h.samples) for phase, h in self.phases.items()},
+            }
+
+    def merge(self, raw: dict):
+        """Fold in metrics gathered elsewhere, e.g. in a worker process."""
+        with self._lock:
+            for name, n in raw.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + n
+            for phase, samples in raw.get("phases", {}).items():
+                self.phases.setdefault(phase, Histogram()).samples.extend(samples)
+
+    def snapshot(self, **extra) -> dict:
+        """Everything gathered so far, plus derived rates and any extra fields."""
+        elapsed = self.elapsed()
+        with self._lock:
+            counters = dict(self.counters)
+            phases = {phase: h.summary() for phase, h in sorted(self.phases.items())}
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_sec": round(counters.get("requests", 0) / elapsed, 3) if elapsed else 0.0,
+            "counters": counters,
+            "phases": phases,
+            **extra,
+        }
+
+    def write_json(self, path: Path, **extra):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(**extra), f, indent=2)
+            f.write("\n")
+
+    def report(self) -> list:
+        """One summary line per phase."""
+        lines = []
+        for phase, s in self.snapshot()["phases"].items():
+            lines.append(
+                f"{phase}: {s['count']} calls, {s['total_s']:.2f}s total, "
+                f"p50 {s['p50_ms']:.1f}ms, p95 {s['p95_ms']:.1f}ms"
+            )
+        return lines
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """Background thread printing a progress line every `interval` seconds.
+
+    `done` is read from the `unit` counter of the metrics; `cache` is an
+    optional callable returning (hits, misses).
+    """
+
+    def __init__(self, metrics: Metrics, total: int, unit: str = "files", interval: float = 10.0, cache=None, stream=None):
+        self.metrics = metrics
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.cache = cache
+        self.stream = stream or sys.stderr
+        self._stop = threading.Event()
+        self._thread = None
+
+    def line(self) -> str:
+        done = self.metrics.counters.get(self.unit, 0)
+        elapsed = self.metrics.elapsed()
+        rps = self.metrics.counters.get("requests", 0) / elapsed if elapsed else 0.0
+        parts = [f"⏳ {done}/{self.total} {self.unit} ({done / self.total:.0%})" if self.total else f"⏳ {done} {self.unit}"]
+        parts.append(f"{rps:.1f} req/s")
+        if self.cache:
+            hits, misses = self.cache()
+            if hits + misses:
+                parts.append(f"cache {hits / (hits + misses):.0%} hit")
+        if 0 < done < self.total:
+            parts.append(f"ETA {format_duration(elapsed / done * (self.total - done))}")
+        parts.append(f"elapsed {format_duration(elapsed)}")
+        return " · ".join(parts)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            print(self.line(), file=self.stream, flush=True)
+
+    def start(self) -> "ProgressReporter":
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Offline lookup index for BiblioGenius curated list tooling.
+
+Streams Open Library dumps (the tab-separated ol_dump_*.txt.gz files or
+JSON-lines) and Wikidata JSON dumps into a compact SQLite index, so that
+validate_isbns.py and generate_from_wikidata.py can answer lookups without
+the network. Records are inserted in fixed-size batches, so memory stays
+flat whatever the dump size.
+
+Usage:
+    python offline_index.py build --output offline.sqlite3 ol_dump_authors.txt.gz ol_dump_editions.txt.gz
+    python offline_index.py build --output offline.sqlite3 latest-all.json.gz
+    python offline_index.py query --index offline.sqlite3 --title "Les Misérables" --author "Victor Hugo"
+"""
+
+import argparse
+import gzip
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
+
+from isbn_utils import normalize_isbn
+
+# Wikidata classes kept from the full dump: literary work, written work,
+# novel, version/edition. Anything with an ISBN or an award is kept too.
+WIKIDATA_WORK_CLASSES = {"Q7725634", "Q47461344", "Q8261", "Q3331189"}
+WIKIDATA_HUMAN = "Q5"
+
+LABEL_LANGUAGES = ("fr", "en", "de", "es")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS editions (
+    isbn13 TEXT PRIMARY KEY,
+    work TEXT,
+    title TEXT,
+    title_key TEXT,
+    year TEXT
+);
+CREATE TABLE IF NOT EXISTS works (
+    key TEXT PRIMARY KEY,
+    title TEXT,
+    title_key TEXT,
+    year TEXT
+);
+CREATE TABLE IF NOT EXISTS work_authors (
+    work TEXT NOT NULL,
+    author TEXT NOT NULL,
+    PRIMARY KEY (work, author)
+);
+CREATE TABLE IF NOT EXISTS authors (
+    key TEXT PRIMARY KEY,
+    name TEXT,
+    name_key TEXT
+);
+CREATE TABLE IF NOT EXISTS awards (
+    work TEXT NOT NULL,
+    prize TEXT NOT NULL,
+    PRIMARY KEY (work, prize)
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS editions_title ON editions (title_key);
+CREATE INDEX IF NOT EXISTS editions_work ON editions (work);
+CREATE INDEX IF NOT EXISTS works_title ON works (title_key);
+CREATE INDEX IF NOT EXISTS work_authors_author ON work_authors (author);
+CREATE INDEX IF NOT EXISTS authors_name ON authors (name_key);
+CREATE INDEX IF NOT EXISTS awards_prize ON awards (prize);
+"""
+
+
+def text_key(text: str) -> str:
+    """Normalize a title or name: lowercase, no accents, alphanumeric tokens."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _open_dump(path: Path):
+    """Open a plain or gzip dump for line-by-line reading."""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    """Yield JSON records from an Open Library or Wikidata dump, one line at a time."""
+    with _open_dump(path) as f:
+        for line in f:
+            line = line.strip()
+            if line in ("", "[", "]"):
+                continue
+            if not line.startswith("{"):
+                # ol_dump_*.txt: type, key, revision, last_modified, JSON
+                line = line.rsplit("\t", 1)[-1]
+            try:
+                yield json.loads(line.rstrip(","))
+            except ValueError:
+                continue
+
+
+def _claim_values(entity: dict, prop: str) -> list:
+    """Raw datavalue values of a Wikidata claim."""
+    values = []
+    for claim in entity.get("claims", {}).get(prop, []):
+        value = claim.get("mainsnak", {}).get("datavalue", {}).get("value")
+        if value is not None:
+            values.append(value)
+    return values
+
+
+def _claim_ids(entity: dict, prop: str) -> list:
+    """Item ids referenced by a Wikidata claim."""
+    return [v["id"] for v in _claim_values(entity, prop) if isinstance(v, dict) and "id" in v]
+
+
+def _label(entity: dict) -> str:
+    """Preferred label, in the same language order as the SPARQL queries."""
+    labels = entity.get("labels", {})
+    for lang in LABEL_LANGUAGES:
+        if lang in labels:
+            return labels[lang]["value"]
+    return next(iter(labels.values()), {}).get("value", "")
+
+
+def _ol_key(ref) -> Optional[str]:
+    """Bare Open Library key ("OL123W") from a reference object or path."""
+    if isinstance(ref, dict):
+        ref = ref.get("key") or ref.get("author", {}).get("key")
+    return ref.rsplit("/", 1)[-1] if ref else None
+
+
+def _year(text: str) -> str:
+    match = re.search(r"\d{4}", text or "")
+    return match.group(0) if match else ""
+
+
+def iter_rows(records: Iterator[dict]) -> Iterator[tuple]:
+    """Turn dump records into (table, row) pairs for the index."""
+    for record in records:
+        if "claims" in record and record.get("type") == "item":
+            yield from _wikidata_rows(record)
+        elif "key" in record:
+            yield from _open_library_rows(record)
+
+
+def _wikidata_rows(entity: dict) -> Iterator[tuple]:
+    qid = entity["id"]
+    classes = set(_claim_ids(entity, "P31"))
+    label = _label(entity)
+
+    if WIKIDATA_HUMAN in classes:
+        yield "authors", (qid, label, text_key(label))
+        return
+
+    isbns = [v for v in _claim_values(entity, "P212") + _claim_values(entity, "P957") if isinstance(v, str)]
+    prizes = _claim_ids(entity, "P166")
+    if not (classes & WIKIDATA_WORK_CLASSES or isbns or prizes):
+        return
+
+    dates = [v.get("time", "") for v in _claim_values(entity, "P577") if isinstance(v, dict)]
+    year = _year(dates[0]) if dates else ""
+    # Editions point at their work with P629 (edition or translation of);
+    # their authors and awards count for the work, which has its own row
+    work = next(iter(_claim_ids(entity, "P629")), qid)
+
+    if work == qid:
+        yield "works", (qid, label, text_key(label), year)
+    for author in _claim_ids(entity, "P50"):
+        yield "work_authors", (work, author)
+    for prize in prizes:
+        yield "awards", (work, prize)
+    for isbn in isbns:
+        isbn13 = normalize_isbn(isbn)
+        if isbn13:
+            yield "editions", (isbn13, work, label, text_key(label), year)
+
+
+def _open_library_rows(record: dict) -> Iterator[tuple]:
+    key = _ol_key(record["key"])
+    kind = record.get("type", {}).get("key", "") if isinstance(record.get("type"), dict) else ""
+    if not kind:
+        # Untyped records (some partial dumps): go by the key suffix
+        kind = {"A": "/type/author", "W": "/type/work", "M": "/type/edition"}.get(key[-1:], "")
+
+    # Redirect and delete records, among others, carry nothing to index
+    if kind == "/type/author":
+        name = record.get("name", "")
+        yield "authors", (key, name, text_key(name))
+    elif kind == "/type/work":
+        title = record.get("title", "")
+        yield "works", (key, title, text_key(title), _year(record.get("first_publish_date", "")))
+        for author in record.get("authors", []):
+            author_key = _ol_key(author)
+            if author_key:
+                yield "work_authors", (key, author_key)
+    elif kind == "/type/edition":
+        works = [_ol_key(w) for w in record.get("works", [])]
+        work = works[0] if works and works[0] else key
+        title = record.get("title", "")
+        year = _year(record.get("publish_date", ""))
+        for author in record.get("authors", []):
+            author_key = _ol_key(author)
+            if author_key:
+                yield "work_authors", (work, author_key)
+        for isbn in record.get("isbn_13", []) + record.get("isbn_10", []):
+            isbn13 = normalize_isbn(isbn)
+            if isbn13:
+                yield "editions", (isbn13, work, title, text_key(title), year)
+
+
+def build_index(dumps: list, output: Path, batch_size: int = 10_000) -> dict:
+    """Stream dumps into the SQLite index at `output`; returns row counts per table."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(output))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=OFF")
+    db.executescript(SCHEMA)
+
+    placeholders = {"editions": 5, "works": 4, "work_authors": 2, "authors": 3, "awards": 2}
+    counts = dict.fromkeys(placeholders, 0)
+
+    for dump in dumps:
+        print(f"Indexing {dump}...")
+        rows = iter_rows(iter_records(Path(dump)))
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            grouped = {}
+            for table, row in batch:
+                grouped.setdefault(table, []).append(row)
+            with db:
+                for table, table_rows in grouped.items():
+                    marks = ", ".join("?" * placeholders[table])
+                    db.executemany(f"INSERT OR IGNORE INTO {table} VALUES ({marks})", table_rows)
+                    counts[table] += len(table_rows)
+
+    db.executescript(INDEXES)
+    db.execute("ANALYZE")
+    db.close()
+    return counts
+
+
+class OfflineIndex:
+    """Read-only queries over an index built by build_index()."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def has_isbn(self, isbn: str) -> bool:
+        """Whether an edition with this ISBN is known."""
+        isbn13 = normalize_isbn(isbn)
+        return bool(isbn13) and bool(self._query("SELECT 1 FROM editions WHERE isbn13 = ?", (isbn13,)))
+
+    def work_for_isbn(self, isbn: str) -> Optional[str]:
+        """Work key (Open Library id or Wikidata QID) of an edition."""
+        rows = self._query("SELECT work FROM editions WHERE isbn13 = ?", (normalize_isbn(isbn),))
+        return rows[0][0] if rows else None
+
+    def authors_of(self, work: str) -> list:
+        """Author names of a work."""
+        rows = self._query(
+            "SELECT a.name FROM work_authors wa JOIN authors a ON a.key = wa.author WHERE wa.work = ?",
+            (work,),
+        )
+        return [r[0] for r in rows]
+
+    def edition(self, isbn: str) -> Optional[dict]:
+        """Title, authors and year of an edition, falling back to its work's."""
+        rows = self._query(
+            "SELECT e.work, COALESCE(NULLIF(e.title, ''), w.title), COALESCE(NULLIF(e.year, ''), w.year) "
+            "FROM editions e LEFT JOIN works w ON w.key = e.work WHERE e.isbn13 = ?",
+            (normalize_isbn(isbn),),
+        )
+        if not rows:
+            return None
+        work, title, year = rows[0]
+        return {"title": title or "", "authors": self.authors_of(work), "year": year or ""}
+
+    def candidates(self, title: str) -> list:
+        """(isbn13, work) pairs whose edition or work title matches `title`."""
+        key = text_key(title)
+        return self._query(
+            "SELECT isbn13, work FROM editions WHERE title_key = ? "
+            "UNION SELECT e.isbn13, e.work FROM works w JOIN editions e ON e.work = w.key WHERE w.title_key = ?",
+            (key, key),
+        )
+
+    def title_candidates(self, title: str) -> list:
+        """(title, authors, isbns) of each work titled `title`, for scoring with matching.MatchIndex."""
+        works = {}
+        for isbn13, work in self.candidates(title):
+            # Editions without a work are books of their own
+            works.setdefault(work or isbn13, (work, []))[1].append(isbn13)
+        return [
+            (title, tuple(self.authors_of(work)) if work else (), tuple(sorted(isbns)))
+            for work, isbns in works.values()
+        ]
+
+    def search_isbn(self, title: str, author: str = None) -> Optional[str]:
+        """Offline counterpart of search_book_isbn: best ISBN-13 for a title/author."""
+        candidates = sorted(self.candidates(title), key=lambda c: (not c[0].startswith("978"), c[0]))
+        if not author:
+            return candidates[0][0] if candidates else None
+
+        author_tokens = set(text_key(author).split())
+        without_authors = None
+        for isbn13, work in candidates:
+            names = self.authors_of(work)
+            if not names:
+                without_authors = without_authors or isbn13
+                continue
+            if any(author_tokens <= set(text_key(name).split()) for name in names):
+                return isbn13
+        return without_authors
+
+    def prize_winners(self, prize_id: str) -> list:
+        """Works that received a prize, shaped like get_prize_winners() results."""
+        rows = self._query(
+            "SELECT w.key, w.title, w.year, "
+            "(SELECT MIN(isbn13) FROM editions e WHERE e.work = w.key) "
+            "FROM awards aw JOIN works w ON w.key = aw.work WHERE aw.prize = ? ORDER BY w.year DESC",
+            (prize_id,),
+        )
+        return [
+            {
+                "title": title,
+                "author": ", ".join(self.authors_of(key)) or "Unknown",
+                "year": year or "",
+                "isbn": isbn or "",
+                "wikidata_id": key,
+            }
+            for key, title, year, isbn in rows
+        ]
+
+    def author_works(self, author_name: str) -> list:
+        """Works by an author, shaped like get_author_works() results."""
+        rows = self._query(
+            "SELECT w.key, w.title, w.year, (SELECT MIN(isbn13) FROM editions e WHERE e.work = w.key) "
+            "FROM authors a JOIN work_authors wa ON wa.author = a.key JOIN works w ON w.key = wa.work "
+            "WHERE a.name_key = ? ORDER BY w.year",
+            (text_key(author_name),),
+        )
+        return [
+            {
+                "title": title,
+                "author": author_name,
+                "year": year or "",
+                "isbn": isbn or "",
+                # Works from an Open Library dump have no Wikidata id
+                "wikidata_id": key if re.fullmatch(r"Q\d+", key) else None,
+            }
+            for key, title, year, isbn in rows
+        ]
+
+    def close(self):
+        self._db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offline lookup index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Stream dump files into an index")
+    build.add_argument("dumps", nargs="+", type=Path, help="Open Library or Wikidata dump files (.gz or plain)")
+    build.add_argument("--output", type=Path, required=True, help="Index file to create or extend")
+    build.add_argument("--batch-size", type=int, default=10_000, help="Rows inserted per transaction")
+
+    query = sub.add_parser("query", help="Look up a title/author or an ISBN")
+    query.add_argument("--index", type=Path, required=True, help="Index file")
+    query.add_argument("--title", help="Book title")
+    query.add_argument("--author", help="Author name")
+    query.add_argument("--isbn", help="ISBN to check")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        counts = build_index(args.dumps, args.output, args.batch_size)
+        for table, count in counts.items():
+            print(f"  {table}: {count}")
+        return
+
+    index = OfflineIndex(args.index)
+    if args.isbn:
+        print(f"{args.isbn}: {'known' if index.has_isbn(args.isbn) else 'unknown'} (work {index.work_for_isbn(args.isbn)})")
+    if args.title:
+        print(index.search_isbn(args.title, args.author) or "No match")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
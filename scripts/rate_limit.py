@@ -0,0 +1,35 @@
+"""
+Shared rate limiting for BiblioGenius curated list tooling.
+
+A token bucket that many worker threads can draw from, so concurrent
+Open Library / Wikidata lookups stay under a global requests-per-second cap.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting calls to `rate` per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
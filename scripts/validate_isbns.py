@@ -4,16 +4,45 @@ ISBN Validator and Fixer for BiblioGenius Curated Lists
 
 Uses Open Library API to validate ISBNs and find correct ones.
 Run with: python validate_isbns.py --fix
+Lookups run concurrently under a shared rate limit:
+    python validate_isbns.py --fix --concurrency 8 --rps 2
+Files can be spread over worker processes with --jobs N.
+Identical searches from different lists run once per run; --duplicates
+reports ISBNs shared between lists.
+Long runs can report progress and per-phase timings (--verbose prints
+per-host HTTP and per-phase summaries at the end):
+    python validate_isbns.py --fix --progress 30 --metrics-json metrics.json --verbose
+An interrupted --fix run picks up where it stopped with --resume.
+Network traffic can be recorded once and replayed offline:
+    python validate_isbns.py --fix --no-cache --record recordings/
+    python validate_isbns.py --fix --no-cache --replay recordings/ --replay-latency 0.01
+Single lists or categories from index.yml can be checked on their own:
+    python validate_isbns.py --list goncourt --category manga
+Only the lists a generate_from_wikidata.py run changed, and with
+--incremental only their new entries:
+    python validate_isbns.py --changes changes.json --incremental
+Runs can be shared between processes and hosts through a work queue; the
+coordinator prints the combined SUMMARY:
+    python validate_isbns.py --fix --queue /shared/queue.sqlite --jobs 4
+    python validate_isbns.py --fix --queue /shared/queue.sqlite --worker --jobs 8
+Editors and pre-commit hooks can ask validation_daemon.py, which keeps
+caches warm and revalidates only edited entries, instead of running this.
 
 Dependencies: pip install requests pyyaml
 """
 
 import argparse
 import glob
-import os
+import hashlib
+import io
+import json
 import re
-import time
+import subprocess
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
+from typing import Optional
 
 try:
     import requests
@@ -22,143 +51,643 @@ except ImportError:
     print("Please install dependencies: pip install requests pyyaml")
     exit(1)
 
+from atomic_file import AtomicFile, atomic_write_text
+from checkpoint import FixJournal, load_journal
+from curated_bundle import compose_yaml, load_yaml
+from curated_lists import CuratedLists
+from http_client import HTTPClient, TransientError
+from http_replay import open_replay
+from isbn_set import ISBNSet
+from isbn_utils import normalize_isbn, validate_isbn
+from list_merge import changed_files
+from lookup_cache import DEFAULT_CACHE_DIR, LookupCache, normalize_key, open_cache
+from matching import Candidate, Match, MatchIndex, candidates_from_docs, infer_language
+from metrics import Metrics, ProgressReporter
+from offline_index import OfflineIndex
+from rate_limit import TokenBucket
+from work_queue import JobFailed, QueuedJob, WorkQueue, run_worker, watch_workers
+
 OPEN_LIBRARY_SEARCH = "https://openlibrary.org/search.json"
 OPEN_LIBRARY_ISBN = "https://openlibrary.org/isbn/{}.json"
 
-# Cache to avoid repeated API calls
-isbn_cache = {}
+# Cache to avoid repeated API calls; made persistent from --cache-dir in main()
+lookup_cache = LookupCache(directory=None)
+
+# Shared across lookup threads; reconfigured from --rps in main()
+rate_limiter = TokenBucket(rate=2.0)
+
+# Pooled, rate-limited client with retries; rebuilt in configure_lookups()
+session = HTTPClient(rate_limiter=rate_limiter)
+
+# Local dump index answering lookups instead of the network (--offline-index)
+offline_index = None
+
+# Memory-mapped set of known ISBN-13s checked before any HEAD request (--isbn-set)
+isbn_set = None
+
+# Matches scoring below this are reported but not written (--min-confidence)
+min_confidence = 0.6
+
+# Counters reported in the SUMMARY
+SUMMARY_KEYS = ("books", "valid", "invalid", "fixed", "not_found")
+
+# Per-phase counters and latencies for --metrics-json and --progress
+metrics = Metrics()
+
+# One search per distinct question per run, shared by every list asking it
+_search_memo = {}
+_search_lock = threading.Lock()
+shared_lookups = 0
 
+# Searches started by schedule_lookups() that no entry has picked up yet
+_scheduled = set()
 
-def validate_isbn(isbn: str) -> bool:
-    """Validate ISBN-10 or ISBN-13 checksum."""
-    isbn = isbn.replace("-", "").replace(" ", "")
+# Checkpoint journal of --fix progress, and lookups replayed from it (--resume)
+journal = None
+_journal_lookups = {}
+resumed_lookups = 0
+
+
+def _search_key(title: str, author: str = None, language: str = None) -> tuple:
+    """Identify a search for coalescing and for the checkpoint journal."""
+    return (normalize_key(f"{title} {author or ''}"), language)
+
+
+def _match_cache_key(title: str, author: str = None, language: str = None) -> str:
+    query = f"{title} {author}" if author else title
+    return f"{normalize_key(query)}|{language or ''}"
+
+
+def local_match(title: str, author: str = None, language: str = None) -> Optional[Match]:
+    """Answer a search from the lookup cache or offline index; None when only the network can."""
+    hit, cached = lookup_cache.get("match", _match_cache_key(title, author, language))
+    if hit:
+        return Match(*cached) if cached else Match(None, 0.0)
     
-    if len(isbn) == 10:
-        # ISBN-10 validation
-        if not isbn[:-1].isdigit() or (isbn[-1] not in "0123456789Xx"):
-            return False
-        total = sum((10 - i) * (int(c) if c.isdigit() else 10) for i, c in enumerate(isbn))
-        return total % 11 == 0
-    elif len(isbn) == 13:
-        # ISBN-13 validation
-        if not isbn.isdigit():
-            return False
-        total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(isbn))
-        return total % 10 == 0
-    return False
+    if offline_index:
+        # Notes come either way round, so look both halves up as titles and score like search results
+        rows = offline_index.title_candidates(title) + (offline_index.title_candidates(author) if author else [])
+        match = MatchIndex([Candidate(*row) for row in rows]).best_match(title, author, language)
+        if journal:
+            journal.lookup(_search_key(title, author, language), match.isbn, match.confidence)
+        return match
+    return None
+
+
+def search_book_isbn(title: str, author: str = None, language: str = None) -> Match:
+    """Search Open Library for a book and return the best-scoring ISBN-13.
 
+    `title` and `author` are the two halves of a note, in either order. The
+    returned Match carries a confidence between 0 and 1.
+    """
+    match = local_match(title, author, language)
+    if match is not None:
+        return match
+    return fetch_match(title, author, language)
 
-def search_book_isbn(title: str, author: str = None):
-    """Search Open Library for a book and return its ISBN-13."""
-    query = title
-    if author:
-        query = f"{title} {author}"
+
+def fetch_match(title: str, author: str = None, language: str = None) -> Match:
+    """The network half of search_book_isbn(), for searches known to miss locally."""
+    query = f"{title} {author}" if author else title
+    cache_key = _match_cache_key(title, author, language)
+    try:
+        params = {"q": query, "limit": 20, "fields": "isbn,title,author_name,language"}
+        metrics.incr("requests")
+        with metrics.timer("search"):
+            response = session.get(OPEN_LIBRARY_SEARCH, params=params, timeout=10)
+        if response.status_code != 200:
+            print(f"  Error searching for '{query}': HTTP {response.status_code}")
+            return Match(None, 0.0)
+        data = response.json()
+    except (TransientError, ValueError) as e:
+        # Not cached: the next run should ask again
+        print(f"  Error searching for '{query}': {e}")
+        return Match(None, 0.0)
+    
+    match = MatchIndex(candidates_from_docs(data.get("docs", []))).best_match(title, author, language)
+    lookup_cache.set("match", cache_key, [match.isbn, match.confidence] if match.isbn else None)
+    if journal:
+        journal.lookup(_search_key(title, author, language), match.isbn, match.confidence)
+    return match
+
+
+def check_isbn_exists(isbn: str) -> Optional[bool]:
+    """Check if ISBN exists in Open Library; --fix confirms found ISBNs with it.
+
+    Returns None when Open Library could not give a definitive answer
+    (throttling, outages), rather than reporting the ISBN as missing.
+    """
+    if isbn_set is not None and normalize_isbn(isbn) in isbn_set:
+        return True
     
-    # Check cache
-    cache_key = query.lower().strip()
-    if cache_key in isbn_cache:
-        return isbn_cache[cache_key]
+    hit, cached = lookup_cache.get("isbn", isbn)
+    if hit:
+        return cached
+    
+    if offline_index:
+        return offline_index.has_isbn(isbn)
     
     try:
-        params = {"q": query, "limit": 5, "fields": "isbn,title,author_name"}
-        response = requests.get(OPEN_LIBRARY_SEARCH, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get("docs"):
-            for doc in data["docs"]:
-                isbns = doc.get("isbn", [])
-                # Prefer ISBN-13
-                for isbn in isbns:
-                    if len(isbn) == 13 and isbn.startswith("978"):
-                        isbn_cache[cache_key] = isbn
-                        return isbn
-                # Fallback to any ISBN
-                if isbns:
-                    isbn_cache[cache_key] = isbns[0]
-                    return isbns[0]
-        
-        isbn_cache[cache_key] = None
+        metrics.incr("requests")
+        with metrics.timer("head"):
+            response = session.head(OPEN_LIBRARY_ISBN.format(isbn), timeout=5)
+    except TransientError as e:
+        print(f"  Error checking ISBN {isbn}: {e}")
         return None
-    except Exception as e:
-        print(f"  Error searching for '{query}': {e}")
+    
+    if response.status_code not in (200, 404):
         return None
+    exists = response.status_code == 200
+    lookup_cache.set("isbn", isbn, exists)
+    return exists
 
 
-def check_isbn_exists(isbn: str) -> bool:
-    """Check if ISBN exists in Open Library."""
-    try:
-        response = requests.head(OPEN_LIBRARY_ISBN.format(isbn), timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+def search_once(title: str, author: str = None, language: str = None, executor: ThreadPoolExecutor = None) -> Future:
+    """Future for search_book_isbn(), coalesced with identical searches from other entries.
+
+    Without an executor the search runs immediately in the calling thread.
+    """
+    global shared_lookups, resumed_lookups
+    key = _search_key(title, author, language)
+    with _search_lock:
+        if key in _journal_lookups:
+            resumed_lookups += 1
+            return _done(_journal_lookups[key])
+        future = _search_memo.get(key)
+        if future is not None:
+            if key in _scheduled:
+                _scheduled.discard(key)
+            else:
+                shared_lookups += 1
+            return future
+        if executor:
+            future = executor.submit(search_book_isbn, title, author, language)
+            _search_memo[key] = future
+            return future
+    future = _done(search_book_isbn(title, author, language))
+    with _search_lock:
+        _search_memo.setdefault(key, future)
+    return future
 
 
 def parse_note(note: str) -> tuple[str, str]:
     """Extract title and author from note field."""
-    # Format: "Title - Author (Year)" or "Title - Author"
+    # Format: "Title - Author (Year)" or "Title - Author"; lists also use
+    # "Author - Title", which search_book_isbn handles by matching both ways
     match = re.match(r"(.+?)\s*-\s*(.+?)(?:\s*\(.*\))?$", note)
     if match:
         return match.group(1).strip(), match.group(2).strip()
     return note, None
 
 
-def process_yaml_file(filepath: Path, fix: bool = False) -> dict:
-    """Process a single YAML file and validate ISBNs."""
+def _done(value) -> Future:
+    """Wrap an already computed value in a completed Future."""
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def patch_isbns(content: str, fixes: dict) -> str:
+    """Rewrite only the `isbn:` scalars of the given book indexes, keeping the rest of the text.
+
+    `fixes` maps an index in `books` to its new ISBN. Each value is replaced
+    in place at its source offset, so comments, key order and formatting
+    are untouched. Quoted values keep their quote style; plain ones are
+    written double-quoted, since an unquoted ISBN-13 would load as an int.
+    """
+    root = compose_yaml(content)
+    books = next(value for key, value in root.value if key.value == 'books')
+    
+    spans = []
+    for i, isbn in fixes.items():
+        node = next(value for key, value in books.value[i].value if key.value == 'isbn')
+        quote = node.style if node.style in ('"', "'") else '"'
+        spans.append((node.start_mark.index, node.end_mark.index, f"{quote}{isbn}{quote}"))
+    
+    # Patch from the end so earlier offsets stay valid
+    for start, end, text in sorted(spans, reverse=True):
+        content = content[:start] + text + content[end:]
+    return content
+
+
+def _entry_key(book: dict) -> str:
+    """Identify a list entry by its ISBN and note for incremental runs."""
+    return f"{book.get('isbn', '')}\t{book.get('note', '')}"
+
+
+def _is_settled(record: dict, fix: bool) -> bool:
+    """Whether a previous entry result can be reused for this run."""
+    return record['valid'] or not fix or 'not_found' in record
+
+
+def list_language(books: list) -> Optional[str]:
+    """Edition language implied by a list's existing ISBNs, e.g. 978-2 -> French."""
+    return infer_language([b.get('isbn', '') for b in books if validate_isbn(b.get('isbn', ''))])
+
+
+def pending_searches(books: list, known: dict) -> list:
+    """(index, book) of entries a --fix run has to search for."""
+    pending = []
+    for i, book in enumerate(books):
+        isbn = book.get('isbn', '')
+        record = known.get(_entry_key(book))
+        if record and _is_settled(record, True):
+            continue
+        if isbn and not validate_isbn(isbn):
+            pending.append((i, book))
+    return pending
+
+
+def changed_lists(curated_path: Path) -> set:
+    """List files with uncommitted changes (or untracked) according to git, as resolved paths."""
+    names = set()
+    for command in (["git", "diff", "--name-only", "--relative", "HEAD"], ["git", "ls-files", "--others", "--exclude-standard"]):
+        try:
+            result = subprocess.run(command, cwd=curated_path, capture_output=True, text=True, timeout=30, check=True)
+        except (OSError, subprocess.SubprocessError):
+            return set()
+        names.update(result.stdout.split("\n"))
+    return {(curated_path / name).resolve() for name in names if name.endswith(".yml")}
+
+
+def schedule_lookups(todo: list, executor: ThreadPoolExecutor, priority: set = frozenset()) -> dict:
+    """Collect every search a --fix run needs before any file is processed.
+
+    `todo` holds (filepath, known) pairs. Searches answered by the cache or
+    offline index are resolved on the spot; the remaining distinct searches
+    are queued on the executor, those from lists in `priority` first, so
+    the network stays busy across file boundaries. process_yaml_file then
+    finds every result through search_once().
+    """
+    local, queued, duplicates, prioritized = 0, [], 0, 0
+    seen = set()
+    ordered = sorted(todo, key=lambda item: item[0].resolve() not in priority)
+    for filepath, known in ordered:
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                with metrics.timer("parse"):
+                    data = load_yaml(f)
+        except yaml.YAMLError:
+            # process_yaml_file reports it
+            continue
+        books = (data or {}).get('books') or []
+        language = list_language(books)
+        for _, book in pending_searches(books, known or {}):
+            title, author = parse_note(book.get('note', ''))
+            key = _search_key(title, author, language)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            if key in _journal_lookups:
+                local += 1
+                continue
+            match = local_match(title, author, language)
+            if match is not None:
+                with _search_lock:
+                    _search_memo.setdefault(key, _done(match))
+                    _scheduled.add(key)
+                local += 1
+            else:
+                queued.append((title, author, language))
+                prioritized += filepath.resolve() in priority
+    
+    for title, author, language in queued:
+        key = _search_key(title, author, language)
+        with _search_lock:
+            if key not in _search_memo:
+                _search_memo[key] = executor.submit(fetch_match, title, author, language)
+                _scheduled.add(key)
+    return {"local": local, "network": len(queued), "prioritized": prioritized, "duplicates": duplicates}
+
+
+def process_yaml_file(filepath: Path, fix: bool = False, executor: ThreadPoolExecutor = None, known: dict = None) -> dict:
+    """Process a single YAML file and validate ISBNs.
+
+    With an executor, all lookups for the file are submitted up front and
+    run concurrently; results are still reported in file order.
+    
+    `known` maps entry keys to results from a previous run; those entries are
+    counted from the record instead of being checked again. Results for every
+    entry are returned under stats['entries']. A file that is not valid
+    YAML is reported and returned with its message under stats['error'].
+    """
+    known = known or {}
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
-        data = yaml.safe_load(content)
+    try:
+        with metrics.timer("parse"):
+            data = load_yaml(content)
+    except yaml.YAMLError as e:
+        error = str(e).splitlines()[0]
+        print(f"  ⚠ Could not parse {filepath.name}: {error}")
+        return {"file": str(filepath.name), "books": 0, "valid": 0, "invalid": 0, "fixed": 0, "not_found": 0, "error": error}
     
     if not data or 'books' not in data:
         return {"file": str(filepath), "books": 0, "valid": 0, "invalid": 0, "fixed": 0}
     
     stats = {"file": str(filepath.name), "books": len(data['books']), "valid": 0, "invalid": 0, "fixed": 0, "not_found": 0}
+    metrics.incr("entries", len(data['books']))
+    entries = {}
+    stats['entries'] = entries
+    
+    lookups = {}
+    fixes = {}
+    if fix:
+        language = list_language(data['books'])
+        for i, book in pending_searches(data['books'], known):
+            if executor:
+                lookups[i] = search_once(*parse_note(book.get('note', '')), language, executor)
+            else:
+                lookups[i] = None
     
     for i, book in enumerate(data['books']):
         isbn = book.get('isbn', '')
         note = book.get('note', '')
+        key = _entry_key(book)
+        
+        record = known.get(key)
+        if record and _is_settled(record, fix):
+            entries[key] = record
+            stats['valid' if record['valid'] else 'invalid'] += 1
+            if fix and record.get('not_found'):
+                stats['not_found'] += 1
+            continue
         
         if not isbn:
             stats['invalid'] += 1
+            entries[key] = {"valid": False}
             continue
         
         # Check if ISBN is a valid format
-        is_valid_format = validate_isbn(isbn)
+        with metrics.timer("checksum"):
+            is_valid_format = validate_isbn(isbn)
         
         if is_valid_format:
             stats['valid'] += 1
+            entries[key] = {"valid": True}
         else:
             stats['invalid'] += 1
+            entries[key] = {"valid": False}
             print(f"  ⚠ Invalid ISBN format: {isbn} ({note})")
             
             if fix:
-                title, author = parse_note(note)
-                new_isbn = search_book_isbn(title, author)
-                time.sleep(0.5)  # Rate limiting
+                lookup = lookups[i] or search_once(*parse_note(note), language)
+                match = lookup.result()
+                new_isbn = match.isbn
                 
-                if new_isbn and validate_isbn(new_isbn):
-                    print(f"    ✓ Found: {new_isbn}")
+                if new_isbn and validate_isbn(new_isbn) and match.confidence >= min_confidence and check_isbn_exists(new_isbn) is False:
+                    # Search results can list ISBNs that have no edition record
+                    print(f"    ✗ Match {new_isbn} has no Open Library edition, not applied")
+                    stats['not_found'] += 1
+                    entries[key]['not_found'] = True
+                elif new_isbn and validate_isbn(new_isbn) and match.confidence >= min_confidence:
+                    print(f"    ✓ Found: {new_isbn} (confidence {match.confidence:.2f})")
                     data['books'][i]['isbn'] = new_isbn
+                    fixes[i] = new_isbn
+                    if journal:
+                        journal.fix(str(filepath.resolve()), i, str(isbn), new_isbn)
                     stats['fixed'] += 1
+                    del entries[key]
+                    entries[_entry_key(data['books'][i])] = {"valid": True}
+                elif new_isbn:
+                    print(f"    ✗ Low-confidence match {new_isbn} ({match.confidence:.2f}), not applied")
+                    stats['not_found'] += 1
+                    entries[key]['not_found'] = True
                 else:
                     print(f"    ✗ Could not find valid ISBN")
                     stats['not_found'] += 1
+                    entries[key]['not_found'] = True
     
-    # Write back if fixes were made
-    if fix and stats['fixed'] > 0:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            yaml.dump(data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+    # Write back all of the file's fixes at once, touching only the changed ISBNs
+    if fix and fixes:
+        with metrics.timer("write"):
+            atomic_write_text(filepath, patch_isbns(content, fixes))
         print(f"  → Saved {stats['fixed']} fixes to {filepath.name}")
     
+    if fix and journal:
+        journal.file_done(str(filepath.resolve()), file_digest(filepath), {key: stats[key] for key in SUMMARY_KEYS})
+    
     return stats
 
 
+# Per-process lookup pool used by --jobs workers
+_worker_executor = None
+
+
+def configure_lookups(args: argparse.Namespace, rps: float):
+    """Set up the rate limiter, cache and offline index from command-line flags."""
+    global rate_limiter, session, lookup_cache, offline_index, isbn_set, min_confidence, journal, _journal_lookups
+    rate_limiter = TokenBucket(rate=rps)
+    replay = open_replay(args.record, args.replay, args.replay_latency)
+    session = HTTPClient(rate_limiter=rate_limiter, pool_size=max(args.concurrency, 1), replay=replay)
+    min_confidence = args.min_confidence
+    lookup_cache = open_cache(args.cache_dir, args.no_cache)
+    offline_index = OfflineIndex(args.offline_index) if args.offline_index else None
+    isbn_set = ISBNSet(args.isbn_set) if args.isbn_set else None
+    if args.resume:
+        _journal_lookups = {key: Match(*result) for key, result in load_journal(args.journal)["lookups"].items()}
+    # A queued run is checkpointed by the queue itself
+    journal = FixJournal(args.journal) if args.fix and not args.queue else None
+
+
+def _init_worker(args: argparse.Namespace):
+    """Configure lookups and lookup threads in a --jobs worker."""
+    global _worker_executor
+    # The --rps budget is split evenly between worker processes
+    configure_lookups(args, args.rps / args.jobs)
+    if args.fix and args.concurrency > 1:
+        _worker_executor = ThreadPoolExecutor(max_workers=args.concurrency)
+
+
+def _process_file_job(filepath: Path, fix: bool, known: dict) -> tuple[dict, str]:
+    """Process one file in a worker, returning its stats and buffered output."""
+    global metrics
+    # Fresh metrics per file; the parent merges them from stats['metrics']
+    metrics = Metrics()
+    buffer = io.StringIO()
+    hits, misses, shared, resumed = lookup_cache.hits, lookup_cache.misses, shared_lookups, resumed_lookups
+    with redirect_stdout(buffer):
+        print(f"Checking {filepath.name}...")
+        stats = process_yaml_file(filepath, fix=fix, executor=_worker_executor, known=known)
+    stats['cache_hits'] = lookup_cache.hits - hits
+    stats['cache_misses'] = lookup_cache.misses - misses
+    stats['shared_lookups'] = shared_lookups - shared
+    stats['resumed_lookups'] = resumed_lookups - resumed
+    stats['metrics'] = metrics.raw()
+    # Per-file HTTP stats too; the parent prints them from its own session
+    stats['http'] = session.raw(reset=True)
+    return stats, buffer.getvalue()
+
+
+def _queue_worker(queue_path: Path, curated_path: Path, lease: float) -> int:
+    """Process queued lists in a worker until the queue is drained; returns how many."""
+    queue = WorkQueue(queue_path, lease)
+    
+    def handle(jobs):
+        return {
+            job_id: _process_file_job(curated_path / payload["file"], payload["fix"], payload["known"])
+            for job_id, payload in jobs
+        }
+    
+    try:
+        return run_worker(queue, handle)
+    finally:
+        queue.close()
+
+
+def apply_pending_fixes(filepath: Path, pending: dict) -> int:
+    """Write fixes a previous run decided on but never saved; returns how many applied.
+
+    `pending` maps book indexes to (old ISBN, new ISBN). A fix is skipped if
+    the entry no longer holds the old ISBN.
+    """
+    content = filepath.read_text(encoding='utf-8')
+    books = (load_yaml(content) or {}).get('books') or []
+    fixes = {
+        index: new for index, (old, new) in pending.items()
+        if index < len(books) and str(books[index].get('isbn', '')) == old
+    }
+    if fixes:
+        atomic_write_text(filepath, patch_isbns(content, fixes))
+    return len(fixes)
+
+
+def build_isbn_index(yaml_files: list, curated_path: Path) -> dict:
+    """Map each ISBN-13 in the corpus to the (list, raw ISBN, note) entries using it.
+
+    ISBN-10s are folded into their ISBN-13 so both forms of an edition meet
+    under one key. Invalid ISBNs are keyed by their raw text.
+    """
+    index = {}
+    for filepath in sorted(yaml_files):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = load_yaml(f)
+        except yaml.YAMLError as e:
+            print(f"⚠ Could not parse {filepath.name}: {str(e).splitlines()[0]}")
+            continue
+        if not data or 'books' not in data:
+            continue
+        list_id = data.get('id') or filepath.relative_to(curated_path).as_posix()
+        for book in data['books']:
+            isbn = str(book.get('isbn', '') or '')
+            if not isbn:
+                continue
+            key = normalize_isbn(isbn) or isbn
+            index.setdefault(key, []).append((list_id, isbn, book.get('note', '')))
+    return index
+
+
+def report_duplicates(index: dict):
+    """Print ISBNs shared between lists and ISBN-10/ISBN-13 spellings of one edition."""
+    shared = {isbn: uses for isbn, uses in index.items() if len({list_id for list_id, _, _ in uses}) > 1}
+    variants = {isbn: uses for isbn, uses in index.items() if len({raw for _, raw, _ in uses}) > 1}
+    
+    print("=" * 50)
+    print("DUPLICATES")
+    print("=" * 50)
+    print(f"Distinct ISBNs: {len(index)} ({sum(len(uses) for uses in index.values())} entries)")
+    print(f"In several lists: {len(shared)}")
+    for isbn, uses in sorted(shared.items()):
+        # Notes name the same book whichever way round they put title and author
+        titles = {frozenset(normalize_key(part) for part in parse_note(note) if part) for _, _, note in uses}
+        flag = "  ⚠ different books" if len(titles) > 1 else ""
+        print(f"  {isbn}: {', '.join(sorted({list_id for list_id, _, _ in uses}))}{flag}")
+        if flag:
+            for list_id, _, note in uses:
+                print(f"      {list_id}: {note}")
+    
+    print(f"Near-duplicates (same edition, different spelling): {len(variants)}")
+    for isbn, uses in sorted(variants.items()):
+        spellings = sorted({f"{raw} ({list_id})" for list_id, raw, _ in uses})
+        print(f"  {isbn}: {', '.join(spellings)}")
+    print()
+
+
+def file_digest(filepath: Path) -> str:
+    """SHA-256 of a file's bytes."""
+    return hashlib.sha256(filepath.read_bytes()).hexdigest()
+
+
+def load_manifest(path: Path) -> dict:
+    """Load the incremental validation manifest, or an empty one."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == 1:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": 1, "files": {}}
+
+
+def save_manifest(path: Path, manifest: dict):
+    """Write the manifest atomically so an interrupted run leaves the old one."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with AtomicFile(path) as f:
+        json.dump(manifest, f, ensure_ascii=False)
+        f.commit()
+
+
+def settled_stats(stats: dict) -> dict:
+    """Stats a re-run over the file as written would report (fixes applied)."""
+    return {
+        "books": stats.get('books', 0),
+        "valid": stats.get('valid', 0) + stats.get('fixed', 0),
+        "invalid": stats.get('invalid', 0) - stats.get('fixed', 0),
+        "fixed": 0,
+        "not_found": stats.get('not_found', 0),
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(description="Validate ISBNs in curated list YAML files")
     parser.add_argument("--fix", action="store_true", help="Attempt to fix invalid ISBNs using Open Library")
     parser.add_argument("--path", type=Path, default=Path("../assets/curated_lists"), help="Path to curated lists directory")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of concurrent Open Library lookups (1 = sequential)")
+    parser.add_argument("--rps", type=float, default=2.0, help="Maximum Open Library requests per second across all lookups")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes validating files in parallel")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Directory for the persistent lookup cache (default: ~/.cache/bibliogenius-lists)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the persistent lookup cache")
+    parser.add_argument("--min-confidence", type=float, default=0.6, help="Minimum title/author match score (0-1) for a fix to be written")
+    parser.add_argument("--isbn-set", type=Path, default=None, help="Known-ISBN set built by isbn_set.py, checked before the network")
+    parser.add_argument("--offline-index", type=Path, default=None, help="Answer lookups from an index built by offline_index.py instead of the network")
+    parser.add_argument("--list", action="append", default=[], dest="lists", help="Only validate this list id from index.yml (repeatable)")
+    parser.add_argument("--category", action="append", default=[], help="Only validate the lists of this index.yml category (repeatable)")
+    parser.add_argument("--changes", type=Path, default=None, help="Only validate the lists created or updated according to a generate_from_wikidata.py --changes manifest")
+    parser.add_argument("--duplicates", action="store_true", help="Report ISBNs shared between lists and ISBN-10/13 variants before validating")
+    parser.add_argument("--metrics-json", type=Path, default=None, help="Write counters and per-phase latency histograms to this JSON file")
+    parser.add_argument("--progress", type=float, default=0, help="Print a progress line with an ETA to stderr every N seconds (0 = off)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print per-host HTTP and per-phase timing summaries at the end")
+    parser.add_argument("--journal", type=Path, default=None, help="Checkpoint journal for --fix runs (default: <cache dir>/fix-journal.jsonl)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted --fix run from its journal, skipping finished work")
+    parser.add_argument("--record", type=Path, default=None, help="Save every HTTP response to this record/replay store")
+    parser.add_argument("--replay", type=Path, default=None, help="Answer HTTP requests from a store written by --record, without the network")
+    parser.add_argument("--replay-latency", type=float, default=0.0, help="Artificial delay in seconds added to each replayed response")
+    parser.add_argument("--queue", type=Path, default=None, help="Share the run through this SQLite work queue; --jobs sets the local worker count (0 = coordinate only)")
+    parser.add_argument("--worker", action="store_true", help="With --queue, only process queued lists (e.g. on another host) and exit when the queue is drained")
+    parser.add_argument("--lease", type=float, default=120.0, help="Seconds a queue worker holds a list before another may take it over (renewed while working)")
+    parser.add_argument("--incremental", action="store_true", help="Skip files and entries unchanged since the last incremental run")
+    parser.add_argument("--manifest", type=Path, default=None, help="Manifest file for --incremental (default: <cache dir>/validation-manifest.json)")
     args = parser.parse_args()
     
+    if args.resume and not args.fix:
+        parser.error("--resume only applies to --fix runs")
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be combined")
+    if args.worker and not args.queue:
+        parser.error("--worker needs --queue")
+    if args.queue and args.resume:
+        parser.error("--queue runs resume from the queue; drop --resume")
+    args.journal = args.journal or (args.cache_dir or DEFAULT_CACHE_DIR) / "fix-journal.jsonl"
+    resume_state = load_journal(args.journal) if args.resume else None
+    if args.fix and not args.resume and not args.queue and args.journal.exists():
+        # A new run starts a new journal
+        args.journal.unlink()
+    
+    configure_lookups(args, args.rps)
+    
     curated_path = args.path
     if not curated_path.exists():
         # Try relative to script location
@@ -168,19 +697,189 @@ def main():
         print(f"Error: Could not find curated lists directory at {curated_path}")
         return
     
-    yaml_files = list(curated_path.rglob("*.yml"))
-    yaml_files = [f for f in yaml_files if f.name != "index.yml"]
+    if args.worker:
+        args.jobs = max(1, args.jobs)
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(args,)) as pool:
+            workers = [pool.submit(_queue_worker, args.queue, curated_path, args.lease) for _ in range(args.jobs)]
+            processed = sum(worker.result() for worker in workers)
+        print(f"Processed {processed} queued lists")
+        return
+    
+    subset = bool(args.lists or args.category or args.changes)
+    if args.changes:
+        # Changed lists under --path, addressed through it like the rest of the run
+        root = curated_path.resolve()
+        yaml_files = [curated_path / f.relative_to(root) for f in changed_files(args.changes) if f.is_relative_to(root)]
+    elif subset:
+        # Resolve just the requested lists through index.yml
+        catalog = CuratedLists(curated_path)
+        try:
+            list_ids = list(args.lists)
+            for category in args.category:
+                list_ids += catalog.list_ids(category)
+            yaml_files = sorted({catalog.path(list_id) for list_id in list_ids})
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            return
+    else:
+        yaml_files = list(curated_path.rglob("*.yml"))
+        yaml_files = [f for f in yaml_files if f.name != "index.yml"]
     
     print(f"Found {len(yaml_files)} YAML files to validate\n")
     
+    if args.duplicates:
+        report_duplicates(build_isbn_index(yaml_files, curated_path))
+    
     total_stats = {"books": 0, "valid": 0, "invalid": 0, "fixed": 0, "not_found": 0}
     
-    for filepath in sorted(yaml_files):
-        print(f"Checking {filepath.name}...")
-        stats = process_yaml_file(filepath, fix=args.fix)
+    manifest_path = args.manifest or (args.cache_dir or DEFAULT_CACHE_DIR) / "validation-manifest.json"
+    manifest = load_manifest(manifest_path) if args.incremental else {"version": 1, "files": {}}
+    seen_files = {}
+    skipped = 0
+    resumed = 0
+    recovered = 0
+    worker_cache = {"cache_hits": 0, "cache_misses": 0, "shared_lookups": 0, "resumed_lookups": 0}
+    
+    def cache_counts():
+        return lookup_cache.hits + worker_cache['cache_hits'], lookup_cache.misses + worker_cache['cache_misses']
+    
+    progress = ProgressReporter(metrics, len(yaml_files), unit="files", interval=args.progress, cache=cache_counts).start()
+    
+    executor = None
+    pool = None
+    queue = WorkQueue(args.queue, args.lease) if args.queue else None
+    failed = 0
+    unparsable = 0
+    if queue:
+        # Local queue workers; with --jobs 0 other processes or hosts do the work
+        if args.jobs > 0:
+            pool = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(args,))
+    elif args.jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(args,))
+    elif args.fix and args.concurrency > 1:
+        executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    
+    try:
+        todo = []
+        for filepath in sorted(yaml_files):
+            rel = filepath.relative_to(curated_path).as_posix()
+            record = manifest["files"].get(rel)
+            digest = file_digest(filepath) if args.incremental else None
+            
+            if record and record["sha256"] == digest and (not args.fix or record["fix"] or record["stats"]["invalid"] == 0):
+                seen_files[rel] = record
+                skipped += 1
+                metrics.incr("files")
+                for key in total_stats:
+                    total_stats[key] += record["stats"].get(key, 0)
+                continue
+            
+            if resume_state:
+                key = str(filepath.resolve())
+                done = resume_state["done"].get(key)
+                if done and done["sha256"] == file_digest(filepath):
+                    resumed += 1
+                    metrics.incr("files")
+                    for stat in total_stats:
+                        total_stats[stat] += done["stats"].get(stat, 0)
+                    continue
+                if key in resume_state["pending"]:
+                    applied = apply_pending_fixes(filepath, resume_state["pending"][key])
+                    if applied:
+                        print(f"↺ Applied {applied} fixes to {filepath.name} recorded before the interruption")
+                        recovered += applied
+            
+            todo.append((rel, filepath, digest, record["entries"] if record else None))
         
-        for key in total_stats:
-            total_stats[key] += stats.get(key, 0)
+        if executor:
+            # Answer cached searches now and queue the rest, changed lists first
+            scheduled = schedule_lookups([(filepath, known) for _, filepath, _, known in todo], executor, changed_lists(curated_path))
+            print(f"Scheduled lookups: {scheduled['local']} answered locally, {scheduled['network']} queued for the network "
+                  f"({scheduled['prioritized']} from changed lists), {scheduled['duplicates']} duplicates coalesced\n")
+        
+        if queue:
+            job_ids = {rel: f"{rel}@{file_digest(filepath)}" for rel, filepath, _, _ in todo}
+            # Jobs of unchanged lists left by an interrupted run keep their results
+            queue.retain(job_ids.values())
+            added = queue.add((job_ids[rel], {"file": rel, "fix": args.fix, "known": known}) for rel, _, _, known in todo)
+            if added < len(todo):
+                print(f"Queue: {len(todo) - added} lists carried over from an interrupted run\n")
+            workers = [pool.submit(_queue_worker, args.queue, curated_path, args.lease) for _ in range(args.jobs)]
+            check = watch_workers(workers)
+        
+        jobs = []
+        for rel, filepath, digest, known in todo:
+            if queue:
+                jobs.append((rel, filepath, digest, QueuedJob(queue, job_ids[rel], check)))
+            elif pool:
+                # Each file goes to exactly one worker, so there is one writer per file
+                future = pool.submit(_process_file_job, filepath, args.fix, known)
+                future.add_done_callback(lambda _: metrics.incr("files"))
+                jobs.append((rel, filepath, digest, future))
+            else:
+                print(f"Checking {filepath.name}...")
+                stats = process_yaml_file(filepath, fix=args.fix, executor=executor, known=known)
+                metrics.incr("files")
+                jobs.append((rel, filepath, digest, _done((stats, ""))))
+        
+        # Merge in sorted file order so output and stats are deterministic
+        for rel, filepath, digest, future in jobs:
+            try:
+                stats, output = future.result()
+            except JobFailed as e:
+                print(f"⚠ {filepath.name} failed: {e}")
+                failed += 1
+                continue
+            if queue:
+                metrics.incr("files")
+            print(output, end="")
+            metrics.merge(stats.get('metrics', {}))
+            session.merge(stats.get('http', {}))
+            
+            for key in total_stats:
+                total_stats[key] += stats.get(key, 0)
+            for key in worker_cache:
+                worker_cache[key] += stats.get(key, 0)
+            if stats.get('error'):
+                # Checked again next run, once the file is fixed
+                unparsable += 1
+                continue
+            
+            if args.incremental:
+                seen_files[rel] = {
+                    "sha256": file_digest(filepath) if stats.get('fixed') else digest,
+                    "fix": args.fix,
+                    "stats": settled_stats(stats),
+                    "entries": stats.get('entries', {}),
+                }
+    finally:
+        progress.stop()
+        if executor:
+            executor.shutdown(wait=True)
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if queue:
+            queue.close()
+        if journal:
+            journal.close()
+        if args.incremental:
+            partial = subset or len(seen_files) < len(yaml_files)
+            manifest["files"] = {**manifest["files"], **seen_files} if partial else seen_files
+            save_manifest(manifest_path, manifest)
+    
+    if journal:
+        # Every file finished, so there is nothing left to resume
+        args.journal.unlink(missing_ok=True)
+    if queue and not failed:
+        args.queue.unlink(missing_ok=True)
+    elif failed:
+        print(f"\n⚠ {failed} lists failed; rerun with the same --queue to retry them")
+    
+    if args.incremental:
+        print(f"\nSkipped {skipped} unchanged files")
+    if args.resume:
+        print(f"\nResumed: {resumed} files already finished, {recovered} pending fixes applied, "
+              f"{resumed_lookups + worker_cache['resumed_lookups']} lookups replayed from the journal")
     
     print("\n" + "=" * 50)
     print("SUMMARY")
@@ -192,8 +891,31 @@ def main():
         print(f"Fixed: {total_stats['fixed']}")
         print(f"Could not find: {total_stats['not_found']}")
     
+    if unparsable:
+        print(f"Unparsable files: {unparsable}")
+    
     validity_rate = (total_stats['valid'] / total_stats['books'] * 100) if total_stats['books'] > 0 else 0
     print(f"\nValidity rate: {validity_rate:.1f}%")
+    
+    if args.verbose:
+        for line in session.report():
+            print(f"HTTP {line}")
+        for line in metrics.report():
+            print(f"Phase {line}")
+    
+    hits, misses = cache_counts()
+    if args.fix:
+        print(f"Cache: {hits} hits, {misses} misses")
+        print(f"Shared lookups: {shared_lookups + worker_cache['shared_lookups']} entries reused another list's search")
+    
+    if args.metrics_json:
+        metrics.write_json(
+            args.metrics_json,
+            summary=total_stats,
+            cache={"hits": hits, "misses": misses, "shared_lookups": shared_lookups + worker_cache['shared_lookups']},
+        )
+        print(f"Metrics written to {args.metrics_json}")
+    lookup_cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Long-running validation daemon for BiblioGenius curated lists.
+
+Keeps the interpreter, parsed lists, per-entry results, the lookup cache and
+pooled Open Library connections warm between requests. The curated lists
+directory is polled for changed files, and only the entries that changed
+are revalidated, through the same per-entry records as
+validate_isbns.py --incremental. Editors and pre-commit hooks ask the
+daemon over a local HTTP API instead of re-running validate_isbns.py:
+
+    python validation_daemon.py --port 8765
+    curl -s localhost:8765/status
+    curl -s 'localhost:8765/validate?list=goncourt'
+    curl -sf 'localhost:8765/validate?category=awards&strict=1'   # fails on invalid ISBNs
+    curl -s 'localhost:8765/suggest?list=goncourt'
+
+Endpoints:
+    GET  /status      corpus totals, watch and cache counters
+    GET  /validate    results per list; filter with list=, file= or category=
+                      (repeatable); strict=1 answers 422 when an ISBN is invalid
+    GET  /suggest     Open Library matches for a list's invalid ISBNs (nothing is written)
+    POST /refresh     rescan the directory now instead of at the next poll
+
+Every request rescans first (a stat per file), so answers never lag behind
+the files on disk. The server only listens on 127.0.0.1.
+
+Dependencies: pip install requests pyyaml
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import requests  # noqa: F401  (used through validate_isbns)
+    import yaml
+except ImportError:
+    print("Please install dependencies: pip install requests pyyaml")
+    exit(1)
+
+import validate_isbns
+from curated_bundle import find_list_files, load_yaml
+from metrics import Metrics
+
+
+class ValidationDaemon:
+    """In-memory validation state of a curated lists directory, kept current by polling."""
+
+    def __init__(self, curated_path: Path, executor: ThreadPoolExecutor = None):
+        self.curated_path = curated_path
+        self.executor = executor
+        self.files = {}
+        self.scans = 0
+        self.revalidated = 0
+        self.rechecked_entries = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _signature(self, filepath: Path) -> tuple:
+        stat = filepath.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _validate(self, rel: str, filepath: Path, signature: tuple):
+        previous = self.files.get(rel, {})
+        known = previous.get("entries", {})
+        record = {"signature": signature, "file": rel, "list": filepath.stem, "category": rel.split("/")[0] if "/" in rel else ""}
+        buffer = io.StringIO()
+        # Per-call metrics, so histograms do not grow for the daemon's lifetime
+        validate_isbns.metrics = Metrics()
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                books = (load_yaml(f) or {}).get("books") or []
+            with redirect_stdout(buffer):
+                stats = validate_isbns.process_yaml_file(filepath, known=known)
+        except yaml.YAMLError as e:
+            record.update(books=[], entries={}, error=str(e).splitlines()[0], stats={key: 0 for key in validate_isbns.SUMMARY_KEYS})
+        else:
+            entries = stats.pop("entries", {})
+            record.update(books=books, entries=entries, error=None, stats={key: stats.get(key, 0) for key in validate_isbns.SUMMARY_KEYS})
+            self.rechecked_entries += sum(1 for key in entries if key not in known)
+        record["messages"] = buffer.getvalue().splitlines()
+        self.files[rel] = record
+        self.revalidated += 1
+
+    def scan(self) -> list:
+        """Revalidate new and modified lists, forget deleted ones; returns the changed paths."""
+        with self._lock:
+            self.scans += 1
+            changed = []
+            seen = set()
+            for filepath in find_list_files(self.curated_path):
+                rel = filepath.relative_to(self.curated_path).as_posix()
+                seen.add(rel)
+                try:
+                    signature = self._signature(filepath)
+                except FileNotFoundError:
+                    continue
+                if self.files.get(rel, {}).get("signature") != signature:
+                    self._validate(rel, filepath, signature)
+                    changed.append(rel)
+            for rel in set(self.files) - seen:
+                del self.files[rel]
+                changed.append(rel)
+            return changed
+
+    def watch(self, interval: float, stopped: threading.Event):
+        """Poll for changes every `interval` seconds until `stopped` is set."""
+        while not stopped.wait(interval):
+            changed = self.scan()
+            if changed:
+                print(f"↻ Revalidated {', '.join(changed)}")
+
+    def select(self, lists: list = (), files: list = (), categories: list = ()) -> list:
+        """Records of the requested lists (all lists when nothing is requested)."""
+        with self._lock:
+            records = sorted(self.files.values(), key=lambda r: r["file"])
+        if not (lists or files or categories):
+            return records
+        return [r for r in records if r["list"] in lists or r["file"] in files or r["category"] in categories]
+
+    @staticmethod
+    def report(record: dict) -> dict:
+        invalid = []
+        for key, result in record["entries"].items():
+            if not result["valid"]:
+                isbn, note = key.split("\t", 1)
+                invalid.append({"isbn": isbn, "note": note})
+        return {
+            "list": record["list"],
+            "file": record["file"],
+            **record["stats"],
+            "invalid_entries": invalid,
+            "messages": record["messages"],
+            "error": record["error"],
+        }
+
+    def suggest(self, record: dict) -> list:
+        """Best Open Library match for each invalid ISBN of a list, without writing anything."""
+        books = record["books"]
+        language = validate_isbns.list_language(books)
+        # Straight to search_book_isbn: its cache keeps answers, while the
+        # per-run memo of search_once would also keep transient failures
+        futures = [
+            (book, self.executor.submit(validate_isbns.search_book_isbn, *validate_isbns.parse_note(book.get("note", "")), language))
+            for _, book in validate_isbns.pending_searches(books, {})
+        ]
+        suggestions = []
+        for book, future in futures:
+            match = future.result()
+            applicable = bool(match.isbn) and match.confidence >= validate_isbns.min_confidence
+            suggestions.append({
+                "isbn": book.get("isbn", ""),
+                "note": book.get("note", ""),
+                "match": match.isbn,
+                "confidence": round(match.confidence, 3),
+                # The same gate as --fix, including the edition check
+                "applicable": applicable and validate_isbns.check_isbn_exists(match.isbn) is not False,
+            })
+        return suggestions
+
+    def status(self) -> dict:
+        with self._lock:
+            records = list(self.files.values())
+        totals = {key: sum(r["stats"][key] for r in records) for key in validate_isbns.SUMMARY_KEYS}
+        return {
+            "lists": len(records),
+            **totals,
+            "errors": sum(1 for r in records if r["error"]),
+            "uptime_s": round(time.time() - self.started, 1),
+            "scans": self.scans,
+            "revalidated_lists": self.revalidated,
+            "rechecked_entries": self.rechecked_entries,
+            "cache": {"hits": validate_isbns.lookup_cache.hits, "misses": validate_isbns.lookup_cache.misses},
+        }
+
+
+def make_handler(daemon: ValidationDaemon):
+    """HTTP request handler class bound to a daemon."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            started = time.monotonic()
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            daemon.scan()
+            if parts.path == "/status":
+                self._send(200, daemon.status())
+            elif parts.path == "/validate":
+                records = daemon.select(query.get("list", []), query.get("file", []), query.get("category", []))
+                if not records and parts.query:
+                    self._send(404, {"error": "No matching lists"})
+                    return
+                reports = [daemon.report(r) for r in records]
+                totals = {key: sum(r[key] for r in reports) for key in validate_isbns.SUMMARY_KEYS}
+                ok = totals["invalid"] == 0 and not any(r["error"] for r in reports)
+                body = {"ok": ok, **totals, "lists": reports, "elapsed_ms": round((time.monotonic() - started) * 1000, 2)}
+                self._send(422 if query.get("strict", ["0"])[0] == "1" and not ok else 200, body)
+            elif parts.path == "/suggest":
+                records = daemon.select(query.get("list", []), query.get("file", []))
+                if len(records) != 1:
+                    self._send(404 if not records else 400, {"error": "Give exactly one list= or file="})
+                    return
+                self._send(200, {"list": records[0]["list"], "suggestions": daemon.suggest(records[0])})
+            else:
+                self._send(404, {"error": f"Unknown endpoint: {parts.path}"})
+
+        def do_POST(self):
+            if urlsplit(self.path).path == "/refresh":
+                self._send(200, {"changed": daemon.scan()})
+            else:
+                self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve curated list validation results from a warm, file-watching daemon")
+    parser.add_argument("--path", type=Path, default=Path("../assets/curated_lists"), help="Path to curated lists directory")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the local HTTP API on 127.0.0.1")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls for changed list files")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of concurrent Open Library lookups for /suggest")
+    parser.add_argument("--rps", type=float, default=2.0, help="Maximum Open Library requests per second")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Directory for the persistent lookup cache (default: ~/.cache/bibliogenius-lists)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the persistent lookup cache")
+    parser.add_argument("--min-confidence", type=float, default=0.6, help="Minimum title/author match score (0-1) for a suggestion to be marked applicable")
+    parser.add_argument("--isbn-set", type=Path, default=None, help="Known-ISBN set built by isbn_set.py")
+    parser.add_argument("--offline-index", type=Path, default=None, help="Answer lookups from an index built by offline_index.py instead of the network")
+    parser.add_argument("--replay", type=Path, default=None, help="Answer HTTP requests from a store written by --record, without the network")
+    parser.add_argument("--replay-latency", type=float, default=0.0, help="Artificial delay in seconds added to each replayed response")
+    # Lookup options of validate_isbns.py that do not apply to the daemon
+    parser.set_defaults(fix=False, resume=False, queue=None, record=None, journal=None)
+    args = parser.parse_args()
+
+    validate_isbns.configure_lookups(args, args.rps)
+
+    curated_path = args.path
+    if not curated_path.exists():
+        # Try relative to script location
+        curated_path = Path(__file__).parent.parent / "assets" / "curated_lists"
+    if not curated_path.exists():
+        print(f"Error: Could not find curated lists directory at {curated_path}")
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, args.concurrency))
+    daemon = ValidationDaemon(curated_path, executor)
+    started = time.monotonic()
+    daemon.scan()
+    status = daemon.status()
+    print(f"Validated {status['lists']} lists ({status['books']} books, {status['invalid']} invalid) "
+          f"in {time.monotonic() - started:.2f}s")
+
+    stopped = threading.Event()
+    watcher = threading.Thread(target=daemon.watch, args=(args.interval, stopped), daemon=True)
+    watcher.start()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(daemon))
+    print(f"Listening on http://127.0.0.1:{server.server_address[1]} (watching {curated_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        stopped.set()
+        server.server_close()
+        executor.shutdown(wait=False, cancel_futures=True)
+        validate_isbns.lookup_cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+SQLite work queue with leases for spreading a corpus run over processes and hosts.
+
+A coordinator adds one job per unit of work (a list file, a prize, an
+author) and collects the results; any number of workers claim jobs, hold
+them under a lease they renew while working, and store a JSON result. A job
+whose lease runs out - its worker crashed or was killed - goes back to the
+queue, and the result of a worker that lost its lease is discarded, so
+every job completes exactly once. Jobs that fail repeatedly are marked
+failed instead of being retried forever.
+
+Workers on other hosts can share a queue file on a shared filesystem as
+long as it supports POSIX locks, which SQLite relies on (not every NFS
+setup does). The queue uses SQLite's rollback journal rather than WAL for
+the same reason.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterable
+
+
+class JobFailed(Exception):
+    """A job that failed on every attempt."""
+
+
+def worker_name() -> str:
+    """Unique name of a worker process, e.g. build-01:4242:1a2b3c."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """Jobs with leases, claimed in insertion order."""
+
+    def __init__(self, path: Path, lease: float = 120.0, max_attempts: int = 3):
+        self.path = Path(path)
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA busy_timeout=60000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending', owner TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, seq)")
+
+    def _transaction(self, work: Callable):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                value = work()
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return value
+
+    def add(self, jobs: Iterable[tuple]) -> int:
+        """Queue (id, payload) jobs; ids already queued keep their state. Returns how many were new."""
+        rows = [(job_id, json.dumps(payload)) for job_id, payload in jobs]
+
+        def insert():
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO jobs (id, payload) VALUES (?, ?)", rows)
+            return self._db.total_changes - before
+        return self._transaction(insert)
+
+    def retain(self, job_ids: Iterable[str]):
+        """Drop jobs not in `job_ids` (left over from an older run) and requeue failed ones."""
+        keep = set(job_ids)
+
+        def prune():
+            for (job_id,) in self._db.execute("SELECT id FROM jobs").fetchall():
+                if job_id not in keep:
+                    self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._db.execute("UPDATE jobs SET state = 'pending', attempts = 0, error = NULL WHERE state = 'failed'")
+        self._transaction(prune)
+
+    def claim(self, worker: str, limit: int = 1) -> list:
+        """Lease up to `limit` pending or expired jobs; returns [(id, payload)]."""
+        def lease():
+            now = time.time()
+            rows = self._db.execute(
+                "SELECT id, payload, attempts FROM jobs"
+                " WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) ORDER BY seq",
+                (now,),
+            ).fetchall()
+            claimed = []
+            for job_id, payload, attempts in rows:
+                if attempts >= self.max_attempts:
+                    # Its workers keep dying or hanging; stop handing it out
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'failed', owner = NULL, error = ? WHERE id = ?",
+                        (f"lease expired after {attempts} attempts", job_id),
+                    )
+                    continue
+                self._db.execute(
+                    "UPDATE jobs SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + self.lease, job_id),
+                )
+                claimed.append((job_id, json.loads(payload)))
+                if len(claimed) == limit:
+                    break
+            return claimed
+        return self._transaction(lease)
+
+    def renew(self, worker: str, job_ids: Iterable[str]):
+        """Extend the leases a worker still holds."""
+        until = time.time() + self.lease
+        self._transaction(lambda: self._db.executemany(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+            [(until, job_id, worker) for job_id in job_ids],
+        ))
+
+    def complete(self, worker: str, job_id: str, result) -> bool:
+        """Store a job's result; False if the worker no longer held its lease."""
+        return self._transaction(lambda: self._db.execute(
+            "UPDATE jobs SET state = 'done', result = ?, owner = NULL WHERE id = ? AND owner = ? AND state = 'leased'",
+            (json.dumps(result), job_id, worker),
+        ).rowcount == 1)
+
+    def fail(self, worker: str, job_id: str, error: str):
+        """Give a job back after an error; it is marked failed once out of attempts."""
+        self._transaction(lambda: self._db.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+            " owner = NULL, error = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+            (self.max_attempts, error, job_id, worker),
+        ))
+
+    def release(self, worker: str, job_ids: Iterable[str]):
+        """Give back unfinished jobs without using up an attempt (worker shutting down)."""
+        self._transaction(lambda: self._db.executemany(
+            "UPDATE jobs SET state = 'pending', owner = NULL, attempts = attempts - 1"
+            " WHERE id = ? AND owner = ? AND state = 'leased'",
+            [(job_id, worker) for job_id in job_ids],
+        ))
+
+    def counts(self) -> dict:
+        """Number of jobs per state."""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        with self._lock:
+            for state, n in self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+                counts[state] = n
+        return counts
+
+    def wait(self, job_id: str, poll: float = 0.5, check: Callable = None):
+        """Block until a job is done and return its result; raises JobFailed.
+
+        `check` is called while the job is unfinished and raises to stop
+        waiting, e.g. once the workers meant to run it are gone.
+        """
+        while True:
+            stopped = None
+            if check:
+                # Checked before reading the job, which may have finished just before its worker exited
+                try:
+                    check()
+                except Exception as e:
+                    stopped = e
+            with self._lock:
+                row = self._db.execute("SELECT state, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown job: {job_id}")
+            state, result, error = row
+            if state == "done":
+                return json.loads(result)
+            if state == "failed":
+                raise JobFailed(error)
+            if stopped:
+                raise stopped
+            time.sleep(poll)
+
+    def close(self):
+        self._db.close()
+
+
+class QueuedJob:
+    """Future-like handle on a job another process will complete."""
+
+    def __init__(self, queue: WorkQueue, job_id: str, check: Callable = None):
+        self.queue = queue
+        self.job_id = job_id
+        self.check = check
+
+    def result(self):
+        return self.queue.wait(self.job_id, check=self.check)
+
+
+def watch_workers(futures: list) -> Callable:
+    """A QueuedJob check over the futures of local worker processes.
+
+    It re-raises the exception of a worker that died, and raises once
+    every worker has exited while jobs are still unfinished. With no
+    futures (only remote workers) it never stops the wait.
+    """
+    def check():
+        for future in futures:
+            if future.done() and future.exception():
+                raise future.exception()
+        if futures and all(future.done() for future in futures):
+            raise RuntimeError("every local worker exited with jobs still unfinished")
+    return check
+
+
+class _LeaseKeeper(threading.Thread):
+    """Renews a worker's leases in the background while it works."""
+
+    def __init__(self, queue: WorkQueue, worker: str, job_ids: list):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.worker = worker
+        self.job_ids = job_ids
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.queue.lease / 3):
+            self.queue.renew(self.worker, self.job_ids)
+
+
+def run_worker(queue: WorkQueue, handle: Callable, batch: int = 1, poll: float = 1.0, worker: str = None) -> int:
+    """Claim and process jobs until none are pending or leased; returns how many this worker completed.
+
+    `handle` receives a list of (id, payload) and returns {id: result}.
+    Jobs missing from its answer, answered with an exception, or raising,
+    are failed and retried.
+    Workers keep polling while other workers hold leases, so jobs of a
+    worker that dies are picked up once its lease expires.
+    """
+    worker = worker or worker_name()
+    completed = 0
+    while True:
+        jobs = queue.claim(worker, batch)
+        if not jobs:
+            counts = queue.counts()
+            if not counts["pending"] and not counts["leased"]:
+                return completed
+            time.sleep(poll)
+            continue
+
+        job_ids = [job_id for job_id, _ in jobs]
+        settled = set()
+        keeper = _LeaseKeeper(queue, worker, job_ids)
+        keeper.start()
+        try:
+            results = {}
+            error = "no result"
+            try:
+                results = handle(jobs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            for job_id in job_ids:
+                if isinstance(results.get(job_id), Exception):
+                    queue.fail(worker, job_id, f"{type(results[job_id]).__name__}: {results[job_id]}")
+                elif job_id in results:
+                    completed += queue.complete(worker, job_id, results[job_id])
+                else:
+                    queue.fail(worker, job_id, error)
+                settled.add(job_id)
+        finally:
+            keeper.stopped.set()
+            keeper.join()
+            # Interrupted: give unfinished jobs back at once instead of waiting for the lease
+            unsettled = [job_id for job_id in job_ids if job_id not in settled]
+            if unsettled:
+                queue.release(worker, unsettled)